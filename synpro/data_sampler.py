@@ -1,12 +1,38 @@
 import numpy as np
+import torch
+
+from synpro.data_transformer import EncodedData
+
+
+def count_categories(data, output_info):
+    """Per-category row counts of every discrete column of `EncodedData`, for `category_counts`."""
+    counts = []
+    st = 0
+    for col_info in output_info:
+        if len(col_info) == 1 and col_info[0].activation_fn == 'softmax':
+            counts.append(np.bincount(data.span_codes(st), minlength=col_info[0].dim))
+        st += sum(span_info.dim for span_info in col_info)
+    return counts
+
 
 class DataSampler:
     """
     DataSampler to gracefully skip zero-frequency categories
     and avoid out-of-range indexes or empty categories.
+
+    When `category_counts` is given (one array of per-category counts for each
+    discrete column), the category distribution is taken from those counts
+    instead of from `data`, and every category of `output_info` keeps its slot
+    in the conditional vector, with zero probability when its count is zero.
+    This lets a sampler built on part of the data (a chunk of a larger
+    dataset, the training rows left after a holdout split, or new rows for
+    `partial_fit`) keep the conditional-vector layout the model was built with.
+
+    `data` is either the dense matrix from `DataTransformer.transform` or the
+    compact `EncodedData` from `DataTransformer.encode`.
     """
 
-    def __init__(self, data, output_info, log_frequency):
+    def __init__(self, data, output_info, log_frequency, category_counts=None):
         self._data_length = len(data)
 
         def is_discrete_column(col_info):
@@ -15,8 +41,14 @@ class DataSampler:
         # Identify discrete columns
         n_discrete_columns = sum(is_discrete_column(ci) for ci in output_info)
 
-        # For each discrete column, store row indices by category
-        self._rid_by_cat_cols = []
+        # Row indices grouped by global category, stored CSR-style: the rows of
+        # global category `k` are
+        #   _rid_by_cat_flat[_rid_by_cat_offsets[k]:][:_rid_by_cat_lengths[k]]
+        rid_dtype = 'int32' if self._data_length < np.iinfo('int32').max else 'int64'
+        rid_by_cat = []
+        rid_by_cat_offsets = []
+        rid_by_cat_lengths = []
+        n_rids = 0
         self._discrete_column_cond_st = np.zeros(n_discrete_columns, dtype='int32')
         self._discrete_column_n_category = np.zeros(n_discrete_columns, dtype='int32')
 
@@ -35,32 +67,51 @@ class DataSampler:
                 span = col_info[0]    # e.g. dim=4 for a 4-category column
                 ed = st + span.dim
 
+                if isinstance(data, EncodedData):
+                    rows = np.arange(self._data_length)
+                    codes = data.span_codes(st).astype('int64')
+                else:
+                    codes = np.argmax(data[:, st:ed], axis=1)
+                    rows = np.flatnonzero(data[np.arange(self._data_length), st + codes])
+                    codes = codes[rows]
+                counts = np.bincount(codes, minlength=span.dim)
+
                 # Calculate frequency of each category
-                freq = np.sum(data[:, st:ed], axis=0)
+                if category_counts is None:
+                    freq = counts.astype('float64')
+                else:
+                    freq = np.asarray(category_counts[discrete_id], dtype='float64')
                 if log_frequency:
                     freq = np.log(freq + 1)
 
-                # Filter out zero-frequency categories
-                valid_indices = np.where(freq > 0)[0]
+                if category_counts is None:
+                    # Filter out zero-frequency categories
+                    valid_indices = np.where(freq > 0)[0]
+                else:
+                    valid_indices = np.arange(span.dim)
 
-                # Build rid_by_cat for only the categories that have freq>0
-                rid_list_for_cats = []
-                for cat_idx in valid_indices:
-                    # row IDs where that category=1
-                    cat_rids = np.nonzero(data[:, st + cat_idx])[0]
-                    rid_list_for_cats.append(cat_rids)
+                # Group row IDs by category with one stable sort instead of
+                # one np.nonzero scan per category
+                rid_by_cat.append(rows[np.argsort(codes, kind='stable')].astype(rid_dtype))
+                offsets = n_rids + np.cumsum(counts) - counts
+                rid_by_cat_offsets.append(offsets[valid_indices])
+                rid_by_cat_lengths.append(counts[valid_indices])
+                n_rids += len(rows)
 
                 # Probability distribution over valid categories
                 filtered_freq = freq[valid_indices]
                 total_freq = filtered_freq.sum()
-                if total_freq == 0:
+                if total_freq == 0 and len(valid_indices):
+                    # all counts given as zero: uniform over the kept slots, so
+                    # the CDF still lines up with the conditional vector
+                    cat_prob = np.full(len(valid_indices), 1 / len(valid_indices))
+                elif total_freq == 0:
                     # fallback: if everything is zero, keep an empty distribution
                     cat_prob = []
                 else:
                     cat_prob = filtered_freq / total_freq
 
                 # Store them
-                self._rid_by_cat_cols.append(rid_list_for_cats)
                 self._discrete_column_category_prob.append(cat_prob)
 
                 # Update category offset
@@ -75,29 +126,57 @@ class DataSampler:
                 # skip continuous columns
                 st += sum(sp.dim for sp in col_info)
 
-    def _random_choice_prob_index(self, discrete_column_id):
+        if rid_by_cat:
+            self._rid_by_cat_flat = np.concatenate(rid_by_cat)
+            self._rid_by_cat_offsets = np.concatenate(rid_by_cat_offsets).astype('int64')
+            self._rid_by_cat_lengths = np.concatenate(rid_by_cat_lengths).astype('int64')
+        else:
+            self._rid_by_cat_flat = np.zeros(0, dtype=rid_dtype)
+            self._rid_by_cat_offsets = np.zeros(0, dtype='int64')
+            self._rid_by_cat_lengths = np.zeros(0, dtype='int64')
+
+        self._build_category_cdf()
+
+    def _build_category_cdf(self):
         """
-        Vectorized selection of a valid category from discrete_column_id
-        which might be an array of column-IDs, each referencing a probability array
-        in self._discrete_column_category_prob.
+        Precompute the per-column CDFs used by `_random_choice_prob_index`.
+
+        The CDF of discrete column `i` is stored shifted by `i`, so every column
+        lives in its own (i, i + 1] interval of a single sorted array. Drawing a
+        category for a whole batch is then one `np.searchsorted` call.
         """
-        chosen_categories = []
-        for col in discrete_column_id:
-            # Probability array for that column
-            probs = self._discrete_column_category_prob[col]
+        cdfs = []
+        for col, probs in enumerate(self._discrete_column_category_prob):
             if len(probs) == 0:
-                # if no valid categories exist, fallback or raise error
-                # e.g., fallback to 0
-                chosen_categories.append(0)
                 continue
+            cdf = np.cumsum(probs)
+            # guard against float round-off leaving the last bin below 1,
+            # without giving trailing zero-probability categories any mass
+            cdf[np.flatnonzero(probs)[-1]:] = 1.0
+            cdfs.append(cdf + col)
 
-            # sample a float in [0,1)
-            r = np.random.rand()
-            cdf = probs.cumsum()
-            cat_index = (cdf > r).argmax()
-            chosen_categories.append(cat_index)
+        if cdfs:
+            self._discrete_column_category_cdf = np.concatenate(cdfs)
+        else:
+            self._discrete_column_category_cdf = np.zeros(0)
 
-        return np.array(chosen_categories)
+    def _random_choice_prob_index(self, discrete_column_id):
+        """
+        Vectorized selection of a valid category from discrete_column_id
+        which might be an array of column-IDs, each referencing a probability array
+        in self._discrete_column_category_prob.
+        """
+        discrete_column_id = np.asarray(discrete_column_id)
+        r = np.random.rand(len(discrete_column_id))
+        position = np.searchsorted(
+            self._discrete_column_category_cdf, discrete_column_id + r, side='right'
+        )
+
+        # Local index inside the column. Columns without any valid category
+        # fall back to 0, as before.
+        n_category = self._discrete_column_n_category[discrete_column_id]
+        chosen = position - self._discrete_column_cond_st[discrete_column_id]
+        return np.clip(chosen, 0, np.maximum(n_category - 1, 0))
 
     def sample_condvec(self, batch):
         """
@@ -122,9 +201,12 @@ class DataSampler:
 
         return cond, mask, discrete_column_id, chosen_category_in_col
 
-    def sample_original_condvec(self, batch):
+    def sample_original_condvec(self, batch, random_state=None):
         """
         For generation usage, we flatten the probabilities across all columns.
+
+        `random_state` (numpy RandomState) replaces the global NumPy random
+        state when given.
         """
         if self._n_discrete_columns == 0:
             return None
@@ -141,47 +223,79 @@ class DataSampler:
         all_probs = all_probs / all_probs.sum()
 
         # pick categories
-        cat_ids = np.random.choice(len(all_probs), batch, p=all_probs)
+        rng = np.random if random_state is None else random_state
+        cat_ids = rng.choice(len(all_probs), batch, p=all_probs)
         cond = np.zeros((batch, self._n_categories), dtype='float32')
         cond[np.arange(batch), cat_ids] = 1
         return cond
 
-    def sample_data(self, data, n, col, opt):
+    def sample_idx(self, n, col, opt):
         """
-        Sample data from the real data, matching discrete col conditions.
+        Sample row indices of the real data, matching discrete col conditions.
         If we encounter an empty category, fallback to random row from entire dataset.
         """
         if col is None:
-            idx = np.random.randint(len(data), size=n)
-            return data[idx]
-
-        idx = []
-        for c, o in zip(col, opt):
-            # Check that c, o are in range
-            if c >= len(self._rid_by_cat_cols):
-                # fallback or skip
-                idx.append(np.random.randint(len(data)))
-                continue
+            return np.random.randint(self._data_length, size=n)
 
-            cat_list = self._rid_by_cat_cols[c]
-            if o >= len(cat_list):
-                # fallback for out-of-range category index
-                idx.append(np.random.randint(len(data)))
-                continue
+        col = np.asarray(col)
+        opt = np.asarray(opt)
+        idx = np.random.randint(self._data_length, size=n)
 
-            valid_rows = cat_list[o]
-            if len(valid_rows) == 0:
-                # fallback to random row if category is empty
-                idx.append(np.random.randint(len(data)))
-            else:
-                idx.append(np.random.choice(valid_rows))
+        # Out-of-range column/category ids and empty categories keep the
+        # random fallback row drawn above.
+        n_category = np.zeros(len(col), dtype='int64')
+        col_in_range = (col >= 0) & (col < self._n_discrete_columns)
+        n_category[col_in_range] = self._discrete_column_n_category[col[col_in_range]]
+        valid = col_in_range & (opt >= 0) & (opt < n_category)
+
+        global_category_idx = self._discrete_column_cond_st[col[valid]] + opt[valid]
+        lengths = self._rid_by_cat_lengths[global_category_idx]
+        non_empty = lengths > 0
+        global_category_idx = global_category_idx[non_empty]
+        lengths = lengths[non_empty]
 
-        return data[idx]
+        pick = (np.random.rand(len(lengths)) * lengths).astype('int64')
+        rows = self._rid_by_cat_flat[self._rid_by_cat_offsets[global_category_idx] + pick]
+        idx[np.flatnonzero(valid)[non_empty]] = rows
+
+        return idx
+
+    def sample_data(self, data, n, col, opt):
+        """
+        Sample data from the real data, matching discrete col conditions.
+        If we encounter an empty category, fallback to random row from entire dataset.
+        """
+        return data[self.sample_idx(n, col, opt)]
 
     def dim_cond_vec(self):
         """Return total #categories across all discrete columns (after filtering)."""
         return self._n_categories
 
+    def generate_cond_from_category_ids(self, category_ids, random_state=None):
+        """
+        Build one conditional vector per row of `category_ids`.
+
+        `category_ids` is an `(n, k)` integer array of positions in the
+        conditional vector (as given by `_discrete_column_cond_st` plus the
+        value id), with -1 for "no condition". Rows without any condition get
+        a category drawn as in `sample_original_condvec`.
+        """
+        category_ids = np.asarray(category_ids)
+        if category_ids.ndim == 1:
+            category_ids = category_ids[:, None]
+        n = len(category_ids)
+        vec = np.zeros((n, self._n_categories), dtype='float32')
+        rows, columns = np.nonzero(category_ids >= 0)
+        vec[rows, category_ids[rows, columns]] = 1
+
+        free = np.flatnonzero((category_ids < 0).all(axis=1))
+        if len(free):
+            original = self.sample_original_condvec(len(free), random_state=random_state)
+            if original is not None:
+                vec[free] = original
+
+        return vec
+
     def generate_cond_from_condition_column_info(self, condition_info, batch):
         """
         If the user specifically wants column X=some category (value_id),
@@ -193,17 +307,111 @@ class DataSampler:
         val_id = condition_info['value_id']
 
         # Check for out-of-range
-        if col_id >= len(self._rid_by_cat_cols):
+        if col_id >= self._n_discrete_columns:
             return vec  # fallback with all zeros
-        if val_id >= len(self._rid_by_cat_cols[col_id]):
+        if val_id >= self._discrete_column_n_category[col_id]:
             return vec
 
-        st_index = 0
-        for cid in range(col_id):
-            st_index += len(self._rid_by_cat_cols[cid])
-
-        st_index += val_id
+        st_index = self._discrete_column_cond_st[col_id] + val_id
         if st_index < self._n_categories:
             vec[:, st_index] = 1
 
         return vec
+
+
+class DeviceDataSampler:
+    """
+    DataSampler counterpart that keeps the training data on a torch device.
+
+    The compact `EncodedData` matrix, the CSR row index and the category CDFs
+    of a fitted DataSampler are uploaded once. Category choice, row gathering,
+    conditional-vector building and the one-hot expansion then run as torch
+    ops on `device`, so the training loop does no host-to-device copies.
+
+    Random draws use a generator on `device` seeded from the global torch
+    random state, so they follow the model's `random_state`.
+    """
+
+    def __init__(self, data_sampler, data, device):
+        device = torch.device(device)
+        self._device = device
+        self._data_length = len(data)
+        self._n_discrete_columns = data_sampler._n_discrete_columns
+        self._n_categories = data_sampler._n_categories
+        self._output_dimensions = data.output_dimensions
+
+        def upload(array, dtype=None):
+            tensor = torch.from_numpy(np.ascontiguousarray(array))
+            return tensor.to(device=device, dtype=dtype)
+
+        self._continuous = upload(data.continuous)
+        self._codes = upload(data.codes)
+        self._continuous_columns = upload(data._continuous_columns)
+        self._softmax_offsets = upload(data._softmax_offsets)
+
+        self._rid_by_cat_flat = upload(data_sampler._rid_by_cat_flat, torch.long)
+        self._rid_by_cat_offsets = upload(data_sampler._rid_by_cat_offsets, torch.long)
+        self._rid_by_cat_lengths = upload(data_sampler._rid_by_cat_lengths, torch.long)
+        self._discrete_column_category_cdf = upload(data_sampler._discrete_column_category_cdf)
+        self._discrete_column_cond_st = upload(data_sampler._discrete_column_cond_st, torch.long)
+        self._discrete_column_n_category = upload(
+            data_sampler._discrete_column_n_category, torch.long
+        )
+
+        seed = int(torch.randint(0, 2 ** 62, (1,)).item())
+        self.generator = torch.Generator(device=device).manual_seed(seed)
+
+    def dim_cond_vec(self):
+        """Return total #categories across all discrete columns (after filtering)."""
+        return self._n_categories
+
+    def sample_condvec(self, batch):
+        """Same as `DataSampler.sample_condvec`, returning tensors on the device."""
+        if self._n_discrete_columns == 0:
+            return None
+
+        kwargs = {'device': self._device, 'generator': self.generator}
+        discrete_column_id = torch.randint(self._n_discrete_columns, (batch,), **kwargs)
+        r = torch.rand(batch, dtype=self._discrete_column_category_cdf.dtype, **kwargs)
+        position = torch.searchsorted(
+            self._discrete_column_category_cdf, discrete_column_id + r, right=True
+        )
+
+        n_category = self._discrete_column_n_category[discrete_column_id]
+        cond_st = self._discrete_column_cond_st[discrete_column_id]
+        chosen_category_in_col = torch.minimum(
+            (position - cond_st).clamp(min=0), (n_category - 1).clamp(min=0)
+        )
+
+        rows = torch.arange(batch, device=self._device)
+        mask = torch.zeros(batch, self._n_discrete_columns, device=self._device)
+        mask[rows, discrete_column_id] = 1
+
+        cond = torch.zeros(batch, self._n_categories, device=self._device)
+        has_category = n_category > 0
+        cond[rows[has_category], (cond_st + chosen_category_in_col)[has_category]] = 1
+
+        return cond, mask, discrete_column_id, chosen_category_in_col
+
+    def sample_data(self, n, col, opt):
+        """Dense batch of real rows matching the conditions, as a device tensor."""
+        kwargs = {'device': self._device, 'generator': self.generator}
+        idx = torch.randint(self._data_length, (n,), **kwargs)
+        if col is not None and len(self._rid_by_cat_lengths):
+            global_category_idx = (self._discrete_column_cond_st[col] + opt).clamp(
+                max=len(self._rid_by_cat_lengths) - 1
+            )
+            lengths = self._rid_by_cat_lengths[global_category_idx]
+            lengths = lengths * (self._discrete_column_n_category[col] > 0)
+            pick = (torch.rand(n, **kwargs) * lengths).long()
+            position = (self._rid_by_cat_offsets[global_category_idx] + pick).clamp(
+                max=max(len(self._rid_by_cat_flat) - 1, 0)
+            )
+            rows = self._rid_by_cat_flat[position]
+            # empty categories keep the random fallback row
+            idx = torch.where(lengths > 0, rows, idx)
+
+        out = torch.zeros(n, self._output_dimensions, device=self._device)
+        out[:, self._continuous_columns] = self._continuous[idx]
+        out.scatter_(1, self._softmax_offsets + self._codes[idx].long(), 1.0)
+        return out
@@ -0,0 +1,287 @@
+"""
+Out-of-core data handling for SynPro.
+
+Utilities to train on tables that do not fit in memory:
+
+- `iter_data_chunks` turns a CSV/Parquet path, an in-memory table or a
+  callable into a re-iterable stream of DataFrame chunks.
+- `reservoir_sample` draws a fixed-size uniform sample from such a stream,
+  used to fit the DataTransformer.
+- `ChunkedDataSampler` transforms the stream lazily and serves it as
+  windows of at most `max_chunks_in_memory` chunks, each with its own
+  DataSampler on the category layout of the full dataset.
+- `open_chunk_writer` writes a stream of sampled DataFrame chunks to a CSV,
+  Parquet or Arrow IPC file.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from synpro.data_sampler import DataSampler, count_categories
+from synpro.data_transformer import EncodedData
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as error:
+        raise ImportError(
+            "Streaming Parquet/Arrow files requires `pyarrow`. Install it with `pip install pyarrow`."
+        ) from error
+
+    return pa
+
+
+def _read_parquet_chunks(path, chunksize):
+    pq = _import_pyarrow().parquet
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=chunksize):
+        yield batch.to_pandas()
+
+
+def _slice_chunks(data, chunksize):
+    for start in range(0, len(data), chunksize):
+        if isinstance(data, pd.DataFrame):
+            yield data.iloc[start:start + chunksize]
+        else:
+            yield data[start:start + chunksize]
+
+
+def iter_data_chunks(source, chunksize):
+    """
+    Build a function that returns a fresh iterator of chunks from `source`.
+
+    Args:
+        source (str, os.PathLike, pandas.DataFrame, numpy.ndarray or callable):
+            A `.csv` / `.parquet` path, an in-memory table, or a zero-argument
+            callable returning an iterable of DataFrames (or arrays).
+        chunksize (int):
+            Number of rows per chunk for file and in-memory sources.
+
+    Returns:
+        callable:
+            Zero-argument function returning an iterator over the chunks.
+            Each call starts again from the beginning of the data.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        extension = os.path.splitext(path)[1].lower()
+        if extension in ('.parquet', '.pq'):
+            return lambda: _read_parquet_chunks(path, chunksize)
+        if extension in ('.csv', '.gz', '.bz2', '.zip', '.xz'):
+            return lambda: iter(pd.read_csv(path, chunksize=chunksize))
+        raise ValueError(f"Unsupported file type `{extension}` for streaming; use CSV or Parquet.")
+
+    if isinstance(source, (pd.DataFrame, np.ndarray)):
+        return lambda: _slice_chunks(source, chunksize)
+
+    if callable(source):
+        return lambda: iter(source())
+
+    raise TypeError(
+        "Streaming source must be a CSV/Parquet path, a DataFrame, a NumPy array "
+        "or a callable returning an iterable of chunks."
+    )
+
+
+def reservoir_sample(chunks, size):
+    """
+    Uniform sample of at most `size` rows from an iterable of chunks.
+
+    Vectorized Algorithm R: row `t` of the stream replaces a random slot of
+    the reservoir with probability `size / (t + 1)`. Uses the global NumPy
+    random state, so it follows the model's `random_state`. Array chunks give
+    an array sample, DataFrame chunks a DataFrame.
+    """
+    reservoir = None
+    n_seen = 0
+    is_array = False
+    for chunk in chunks:
+        if not isinstance(chunk, pd.DataFrame):
+            is_array = True
+            chunk = pd.DataFrame(chunk)
+
+        chunk = chunk.reset_index(drop=True)
+        if reservoir is None:
+            reservoir = chunk.iloc[:0]
+
+        n_fill = max(min(size - len(reservoir), len(chunk)), 0)
+        if n_fill:
+            reservoir = pd.concat([reservoir, chunk.iloc[:n_fill]], ignore_index=True)
+
+        rest = np.arange(n_fill, len(chunk))
+        if len(rest):
+            slots = np.random.randint(0, n_seen + rest + 1)
+            accepted = slots < size
+            rest = rest[accepted]
+            slots = slots[accepted]
+            # When several rows hit the same slot, the last one wins.
+            slots, last = np.unique(slots[::-1], return_index=True)
+            rest = rest[::-1][last]
+
+            positions = np.arange(len(reservoir))
+            positions[slots] = len(reservoir) + rest
+            combined = pd.concat([reservoir, chunk], ignore_index=True)
+            reservoir = combined.iloc[positions].reset_index(drop=True)
+
+        n_seen += len(chunk)
+
+    if reservoir is None:
+        raise ValueError("The streaming source did not yield any rows.")
+
+    return reservoir.to_numpy() if is_array else reservoir
+
+
+class ChunkedDataSampler:
+    """
+    Serve transformed training data one window of chunks at a time.
+
+    A first pass over the stream counts the rows and the category frequencies
+    of every discrete column. The global counts give `data_sampler`, used for
+    conditional vectors at sampling time, the distribution of the full
+    dataset. The DataSampler of each window keeps the same conditional vector
+    layout but draws conditions from the window's own counts, so training
+    only conditions on categories that have rows in the window (a stream
+    sorted by a discrete column would otherwise pair most conditions with
+    rows of another category). Only the current window
+    (`max_chunks_in_memory` transformed chunks) is held in memory, as long as
+    the caller drops each window before asking for the next one.
+    """
+
+    def __init__(self, chunks, transformer, log_frequency, max_chunks_in_memory=4):
+        self._chunks = chunks
+        self._transformer = transformer
+        self._log_frequency = log_frequency
+        self._max_chunks_in_memory = max_chunks_in_memory
+
+        discrete_infos = [
+            cti for cti in transformer._column_transform_info_list
+            if cti.column_type == 'discrete'
+        ]
+        category_counts = [np.zeros(cti.output_dimensions) for cti in discrete_infos]
+        self._n_rows = 0
+        for chunk in self._chunks():
+            chunk = self._as_frame(chunk)
+            self._n_rows += len(chunk)
+            discrete_data = transformer._synchronous_transform(chunk, discrete_infos)
+            for counts, (_, codes) in zip(category_counts, discrete_data):
+                counts += np.bincount(codes, minlength=len(counts))
+
+        # Sampler without rows, used for conditional vectors at sampling time.
+        empty = np.zeros((0, transformer.output_dimensions))
+        self.data_sampler = self._build_sampler(empty, category_counts)
+
+    def __len__(self):
+        return self._n_rows
+
+    def _as_frame(self, chunk):
+        if isinstance(chunk, pd.DataFrame):
+            return chunk
+
+        column_names = [str(num) for num in range(chunk.shape[1])]
+        return pd.DataFrame(chunk, columns=column_names)
+
+    def _build_sampler(self, data, category_counts):
+        return DataSampler(
+            data,
+            self._transformer.output_info_list,
+            self._log_frequency,
+            category_counts=category_counts,
+        )
+
+    def _make_window(self, window):
+        data = EncodedData.concatenate(window)
+        # release the per-chunk arrays before the window is handed out
+        window.clear()
+        category_counts = count_categories(data, self._transformer.output_info_list)
+        return data, self._build_sampler(data, category_counts)
+
+    def iter_windows(self):
+        """Yield `(train_data, data_sampler)` pairs covering the stream once."""
+        window = []
+        for chunk in self._chunks():
+            window.append(self._transformer.encode(self._as_frame(chunk)))
+            if len(window) == self._max_chunks_in_memory:
+                yield self._make_window(window)
+
+        if window:
+            yield self._make_window(window)
+
+
+class _CsvChunkWriter:
+    def __init__(self, path):
+        self._path = path
+        self._header = True
+
+    def write(self, chunk):
+        chunk.to_csv(self._path, mode='w' if self._header else 'a', header=self._header, index=False)
+        self._header = False
+
+    def close(self):
+        if self._header:
+            # nothing was written, still leave a valid (empty) file behind
+            open(self._path, 'w').close()
+
+
+class _ArrowChunkWriter:
+    def __init__(self, path, file_format):
+        self._pa = _import_pyarrow()
+        self._path = path
+        self._format = file_format
+        self._writer = None
+
+    def write(self, chunk):
+        table = self._pa.Table.from_pandas(chunk, preserve_index=False)
+        if self._writer is None:
+            if self._format == 'parquet':
+                self._writer = self._pa.parquet.ParquetWriter(self._path, table.schema)
+            else:
+                self._writer = self._pa.ipc.new_file(self._path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def open_chunk_writer(path, file_format=None):
+    """
+    Open a writer that appends DataFrame chunks to a single file.
+
+    Args:
+        path (str or os.PathLike):
+            Destination file.
+        file_format (str or None):
+            One of `'csv'`, `'parquet'` or `'arrow'` (Arrow IPC file). Inferred
+            from the file extension when None.
+
+    Returns:
+        Object with `write(chunk)` and `close()` methods.
+    """
+    path = os.fspath(path)
+    if file_format is None:
+        extension = os.path.splitext(path)[1].lower()
+        file_format = {
+            '.csv': 'csv',
+            '.parquet': 'parquet',
+            '.pq': 'parquet',
+            '.arrow': 'arrow',
+            '.feather': 'arrow',
+            '.ipc': 'arrow',
+        }.get(extension)
+        if file_format is None:
+            raise ValueError(
+                f"Cannot infer the output format from `{extension}`; "
+                "pass file_format='csv', 'parquet' or 'arrow'."
+            )
+
+    if file_format == 'csv':
+        return _CsvChunkWriter(path)
+    if file_format in ('parquet', 'arrow'):
+        return _ArrowChunkWriter(path, file_format)
+
+    raise ValueError(f"Unsupported output format `{file_format}`; use 'csv', 'parquet' or 'arrow'.")
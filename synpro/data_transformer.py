@@ -2,13 +2,21 @@
 DataTransformer module for SynPro.
 """
 
+import os
+import tempfile
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
+import joblib
 import numpy as np
 import pandas as pd
+import rdt
+import torch
 from joblib import Parallel, delayed
 from rdt.transformers import ClusterBasedNormalizer, OneHotEncoder
 
+from synpro.encoders import ContinuousDecoder, ContinuousEncoder, DiscreteEncoder, astype
+
 from synpro.errors import InvalidDataError
 
 SpanInfo = namedtuple('SpanInfo', ['dim', 'activation_fn'])
@@ -16,6 +24,159 @@ ColumnTransformInfo = namedtuple(
     'ColumnTransformInfo',
     ['column_name', 'column_type', 'transform', 'output_info', 'output_dimensions'],
 )
+ConditionInfo = namedtuple(
+    'ConditionInfo',
+    ['discrete_column_id', 'column_id', 'cond_offset', 'value_ids', 'categories'],
+)
+
+
+def _smallest_int_dtype(max_value):
+    for dtype in ('int8', 'int16', 'int32'):
+        if max_value <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype('int64')
+
+
+class EncodedData:
+    """
+    Compact form of the matrix produced by `DataTransformer.transform`.
+
+    Instead of a dense one-hot matrix, the encoded rows are stored as:
+
+    - `continuous`: float32 array with one column per `tanh` span value.
+    - `codes`: small-integer array with the chosen index of every `softmax`
+      span (discrete categories and GMM components).
+
+    Dense rows are only expanded for the rows that are requested, either on
+    the host (`data[idx]`) or directly on a torch device (`take_tensor`).
+    """
+
+    def __init__(self, output_info_list, continuous, codes):
+        self.output_info_list = output_info_list
+        self.continuous = continuous
+        self.codes = codes
+
+        continuous_columns = []
+        softmax_offsets = []
+        dim = 0
+        for col_info in output_info_list:
+            for span_info in col_info:
+                if span_info.activation_fn == 'tanh':
+                    continuous_columns.extend(range(dim, dim + span_info.dim))
+                else:
+                    softmax_offsets.append(dim)
+                dim += span_info.dim
+
+        self.output_dimensions = dim
+        self._continuous_columns = np.array(continuous_columns, dtype='int64')
+        self._softmax_offsets = np.array(softmax_offsets, dtype='int64')
+        self._span_code_index = {offset: i for i, offset in enumerate(softmax_offsets)}
+        self._device_index = {}
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def shape(self):
+        return (len(self), self.output_dimensions)
+
+    @property
+    def nbytes(self):
+        return self.continuous.nbytes + self.codes.nbytes
+
+    def span_codes(self, st):
+        """Chosen index of the softmax span starting at output column `st`."""
+        return self.codes[:, self._span_code_index[st]]
+
+    def __getitem__(self, idx):
+        """Expand the selected rows into a dense float32 array."""
+        continuous = self.continuous[idx]
+        codes = self.codes[idx]
+        out = np.zeros((len(codes), self.output_dimensions), dtype='float32')
+        out[:, self._continuous_columns] = continuous
+        out[np.arange(len(codes))[:, None], self._softmax_offsets + codes] = 1.0
+        return out
+
+    def to_dense(self):
+        return self[:]
+
+    def take_tensor(self, idx, device):
+        """Expand the selected rows into a dense float32 tensor on `device`.
+
+        Only the compact rows are copied to the device; the one-hot expansion
+        happens there.
+        """
+        device = torch.device(device)
+        if device not in self._device_index:
+            self._device_index[device] = (
+                torch.from_numpy(self._continuous_columns).to(device),
+                torch.from_numpy(self._softmax_offsets).to(device),
+            )
+        continuous_columns, softmax_offsets = self._device_index[device]
+
+        continuous = torch.from_numpy(self.continuous[idx]).to(device)
+        codes = torch.from_numpy(self.codes[idx]).to(device).long()
+        out = torch.zeros(len(codes), self.output_dimensions, device=device)
+        out[:, continuous_columns] = continuous
+        out.scatter_(1, softmax_offsets + codes, 1.0)
+        return out
+
+    @classmethod
+    def concatenate(cls, parts):
+        """Stack several EncodedData row-wise."""
+        return cls(
+            parts[0].output_info_list,
+            np.concatenate([part.continuous for part in parts], axis=0),
+            np.concatenate([part.codes for part in parts], axis=0),
+        )
+
+
+# tmpfs when available, so the shared arrays never touch the disk
+_SHARED_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+
+class _SharedArray:
+    """Array backed by a memory-mapped file that worker processes open by path."""
+
+    def __init__(self, shape, dtype):
+        fd, self.path = tempfile.mkstemp(dir=_SHARED_DIR, prefix='synpro-', suffix='.npy')
+        os.close(fd)
+        self.spec = (self.path, tuple(shape), np.dtype(dtype).str)
+        self.array = self.open(self.spec, mode='w+')
+
+    @staticmethod
+    def open(spec, mode='r+'):
+        path, shape, dtype = spec
+        if 0 in shape:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode=mode, shape=shape)
+
+    def close(self):
+        self.array = None
+        os.unlink(self.path)
+
+
+def _transform_worker_task(
+    encoder, column_id, continuous_id, values, start, end, continuous_spec, codes_spec, seed
+):
+    """
+    Transform rows [start, end) of one column and write them to the shared outputs.
+
+    `encoder` is the column's NumPy encoder. GMM components are drawn from a
+    `RandomState(seed)`, as the worker's own global random state is not
+    seeded by the parent.
+    """
+    if isinstance(values, tuple):
+        values = _SharedArray.open(values, mode='r')[start:end]
+
+    values = np.asarray(values)
+    if isinstance(encoder, ContinuousEncoder):
+        normalized, component = encoder.transform(values, np.random.RandomState(seed))
+        _SharedArray.open(continuous_spec)[start:end, continuous_id] = normalized
+    else:
+        component = encoder.transform(values)
+
+    _SharedArray.open(codes_spec)[start:end, column_id] = component
 
 
 class DataTransformer:
@@ -25,14 +186,70 @@ class DataTransformer:
     - Continuous columns: modeled by a ClusterBasedNormalizer (Bayesian GMM),
       resulting in a normalized scalar + one-hot-encoded cluster membership.
     - Discrete columns: one-hot-encoded via RDT's OneHotEncoder.
+
+    Column fitting can be spread over `n_jobs` joblib workers. The Bayesian
+    GMM of a continuous column can be fitted on at most `max_fit_rows` rows,
+    and fitted continuous columns are cached in `cache_dir`, keyed by a hash
+    of the column data and the GMM settings, so re-fitting an unchanged
+    column loads it from disk instead.
+
+    Large transforms are split into column blocks run on `n_jobs` joblib
+    workers, which receive the NumPy encoders of their columns. Numeric input
+    columns and the encoded outputs are exchanged through shared
+    memory-mapped arrays. joblib keeps its worker processes for the next
+    call and stops them once they have been idle for a few minutes. As in
+    joblib, -1 uses all cores; `n_jobs=None`, the default, fits, transforms
+    and inverse transforms in the calling process.
     """
 
-    def __init__(self, max_clusters=10, weight_threshold=0.005):
+    def __init__(
+        self,
+        max_clusters=10,
+        weight_threshold=0.005,
+        n_jobs=None,
+        max_fit_rows=None,
+        cache_dir=None,
+    ):
         self._max_clusters = max_clusters
         self._weight_threshold = weight_threshold
+        self._n_jobs = n_jobs
+        self._max_fit_rows = max_fit_rows
+        self._cache_dir = cache_dir
+
+    def _continuous_cache_path(self, data):
+        key = joblib.hash((
+            data,
+            self._max_clusters,
+            self._weight_threshold,
+            self._max_fit_rows,
+            rdt.__version__,
+        ))
+        return os.path.join(self._cache_dir, f'{key}.pkl')
 
     def _fit_continuous(self, data):
+        if self._cache_dir is None:
+            return self._fit_continuous_column(data)
+
+        cache_path = self._continuous_cache_path(data)
+        if os.path.exists(cache_path):
+            return joblib.load(cache_path)
+
+        column_transform_info = self._fit_continuous_column(data)
+        os.makedirs(self._cache_dir, exist_ok=True)
+        # write to a temporary file first so concurrent fits never read a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix='.tmp')
+        os.close(fd)
+        joblib.dump(column_transform_info, tmp_path)
+        os.replace(tmp_path, cache_path)
+        return column_transform_info
+
+    def _fit_continuous_column(self, data):
         column_name = data.columns[0]
+        if self._max_fit_rows is not None and len(data) > self._max_fit_rows:
+            # fixed seed: the subsample, and so the cache key, only depend on the data
+            rows = np.random.RandomState(0).choice(len(data), self._max_fit_rows, replace=False)
+            data = data.iloc[np.sort(rows)]
+
         gm = ClusterBasedNormalizer(
             missing_value_generation='from_column',
             max_clusters=min(len(data), self._max_clusters),
@@ -82,35 +299,113 @@ class DataTransformer:
 
         self._column_raw_dtypes = raw_data.infer_objects().dtypes
         self._column_transform_info_list = []
+        self._native_encoders = {}
+        self._continuous_decoder = None
 
+        processes = []
         for column_name in raw_data.columns:
             if column_name in discrete_columns:
-                cti = self._fit_discrete(raw_data[[column_name]])
+                processes.append(delayed(self._fit_discrete)(raw_data[[column_name]]))
             else:
-                cti = self._fit_continuous(raw_data[[column_name]])
+                processes.append(delayed(self._fit_continuous)(raw_data[[column_name]]))
+
+        if self._n_jobs is None or self._n_jobs == 1:
+            ctinfo_list = [function(*args, **kwargs) for function, args, kwargs in processes]
+        else:
+            ctinfo_list = Parallel(n_jobs=self._n_jobs)(processes)
 
+        for cti in ctinfo_list:
             self.output_info_list.append(cti.output_info)
             self.output_dimensions += cti.output_dimensions
             self._column_transform_info_list.append(cti)
 
-    def _transform_continuous(self, column_transform_info, data):
-        column_name = data.columns[0]
-        flattened = data[column_name].to_numpy().flatten()
-        data = data.assign(**{column_name: flattened})
-        gm = column_transform_info.transform
-        transformed = gm.transform(data)
+        self._condition_index = self._build_condition_index()
+
+    def _build_condition_index(self):
+        """
+        Map every discrete column name to its `ConditionInfo`.
+
+        `cond_offset` is the position of the column's first category in the
+        conditional vector, `value_ids` maps each category to its index and
+        `categories` is a pandas Index of the categories for bulk lookups.
+        """
+        index = {}
+        discrete_column_id = 0
+        cond_offset = 0
+        for column_id, cti in enumerate(self._column_transform_info_list):
+            if cti.column_type != 'discrete':
+                continue
+
+            categories = pd.Index(cti.transform.dummies, dtype=object)
+            value_ids = {
+                value: value_id for value_id, value in enumerate(categories) if not pd.isna(value)
+            }
+            index[cti.column_name] = ConditionInfo(
+                discrete_column_id, column_id, cond_offset, value_ids, categories
+            )
+            discrete_column_id += 1
+            cond_offset += cti.output_dimensions
+
+        return index
+
+    def _get_condition_info(self, column_name):
+        if getattr(self, '_condition_index', None) is None:
+            # models saved before the index existed
+            self._condition_index = self._build_condition_index()
+
+        info = self._condition_index.get(column_name)
+        if info is None and not self.dataframe:
+            info = self._condition_index.get(str(column_name))
+        if info is None:
+            if any(cti.column_name in (column_name, str(column_name)) for cti in self._column_transform_info_list):
+                raise ValueError(f"Column `{column_name}` is not a discrete column.")
+            raise ValueError(f"Column name `{column_name}` not found in the data.")
+
+        return info
 
-        # First col is normalized, second col is integer cluster -> one-hot
-        output = np.zeros((len(transformed), column_transform_info.output_dimensions))
-        output[:, 0] = transformed[f'{column_name}.normalized'].to_numpy()
-        index = transformed[f'{column_name}.component'].to_numpy().astype(int)
-        output[np.arange(index.size), index + 1] = 1.0
+    def _get_native_encoder(self, column_transform_info):
+        """NumPy encoder exported from the column's fitted RDT transformer, built on first use."""
+        encoders = getattr(self, '_native_encoders', None)
+        if encoders is None:
+            # models saved before the native encoders existed
+            encoders = self._native_encoders = {}
+
+        encoder = encoders.get(column_transform_info.column_name)
+        if encoder is None:
+            if column_transform_info.column_type == 'continuous':
+                encoder = ContinuousEncoder(column_transform_info.transform)
+            else:
+                encoder = DiscreteEncoder(column_transform_info.transform)
+            encoders[column_transform_info.column_name] = encoder
 
-        return output
+        return encoder
+
+    def _get_continuous_decoder(self):
+        """Batched decoder of all the continuous columns, built on first use."""
+        decoder = getattr(self, '_continuous_decoder', None)
+        if decoder is None:
+            encoders = []
+            value_index = []
+            st = 0
+            for cti in self._column_transform_info_list:
+                if cti.column_type == 'continuous':
+                    encoders.append(self._get_native_encoder(cti))
+                    value_index.append(st)
+                st += cti.output_dimensions
+
+            decoder = self._continuous_decoder = ContinuousDecoder(encoders, value_index)
+
+        return decoder
+
+    def _transform_continuous(self, column_transform_info, data):
+        """Return the normalized value (float32) and the GMM component code."""
+        encoder = self._get_native_encoder(column_transform_info)
+        return encoder.transform(data[data.columns[0]].to_numpy())
 
     def _transform_discrete(self, column_transform_info, data):
-        ohe = column_transform_info.transform
-        return ohe.transform(data).to_numpy()
+        """Return the category code of every row."""
+        encoder = self._get_native_encoder(column_transform_info)
+        return None, encoder.transform(data[data.columns[0]].to_numpy())
 
     def _synchronous_transform(self, raw_data, ctinfo_list):
         column_data_list = []
@@ -123,72 +418,185 @@ class DataTransformer:
                 column_data_list.append(self._transform_discrete(info, subset))
         return column_data_list
 
-    def _parallel_transform(self, raw_data, ctinfo_list):
-        processes = []
-        for info in ctinfo_list:
-            colname = info.column_name
-            subset = raw_data[[colname]]
-            if info.column_type == 'continuous':
-                proc = delayed(self._transform_continuous)(info, subset)
-            else:
-                proc = delayed(self._transform_discrete)(info, subset)
-            processes.append(proc)
-        return Parallel(n_jobs=-1)(processes)
+    def _n_workers(self):
+        """Worker count of `n_jobs`, as in joblib: None is one, -1 is all cores."""
+        n_jobs = getattr(self, '_n_jobs', None)
+        if n_jobs is None:
+            return 1
+        if n_jobs < 0:
+            return max((os.cpu_count() or 1) + 1 + n_jobs, 1)
+        return n_jobs
 
-    def transform(self, raw_data):
-        """Convert input DataFrame/ndarray to the numeric array for SynPro training."""
+    def _pooled_transform(self, raw_data, continuous, codes):
+        """
+        Encode `raw_data` on `n_jobs` joblib workers.
+
+        Each task transforms a block of rows of one column and writes its
+        output straight into the shared `continuous`/`codes` arrays. Columns
+        are split into row blocks when there are fewer columns than workers.
+        Every block gets a seed drawn from the global NumPy random state, so
+        the drawn GMM components follow the parent's random state.
+        """
+        n_rows = len(raw_data)
+        n_columns = len(self._column_transform_info_list)
+        n_blocks = min(max(self._n_workers() // n_columns, 1), max(n_rows // 5000, 1))
+        bounds = np.linspace(0, n_rows, n_blocks + 1).astype(int)
+        seeds = np.random.randint(np.iinfo(np.int32).max, size=(n_columns, n_blocks))
+
+        shared = []
+        tasks = []
+        continuous_id = 0
+        try:
+            for column_id, cti in enumerate(self._column_transform_info_list):
+                column = raw_data[cti.column_name]
+                if not pd.api.types.is_extension_array_dtype(column.dtype) and column.dtype.kind in 'biuf':
+                    values = _SharedArray((n_rows,), column.dtype)
+                    values.array[:] = column.to_numpy()
+                    shared.append(values)
+                    blocks = [(values.spec, start, end) for start, end in zip(bounds, bounds[1:])]
+                else:
+                    # non-numeric columns have no fixed-size layout and are pickled
+                    blocks = [
+                        (column.iloc[start:end], start, end) for start, end in zip(bounds, bounds[1:])
+                    ]
+
+                encoder = self._get_native_encoder(cti)
+                for block_id, (values, start, end) in enumerate(blocks):
+                    tasks.append(delayed(_transform_worker_task)(
+                        encoder,
+                        column_id,
+                        continuous_id,
+                        values,
+                        start,
+                        end,
+                        continuous.spec,
+                        codes.spec,
+                        seeds[column_id, block_id],
+                    ))
+
+                if cti.column_type == 'continuous':
+                    continuous_id += 1
+
+            Parallel(n_jobs=self._n_workers())(tasks)
+        finally:
+            for values in shared:
+                values.close()
+
+    def encode(self, raw_data):
+        """Convert input DataFrame/ndarray to the compact `EncodedData` form."""
         if not isinstance(raw_data, pd.DataFrame):
             column_names = [str(num) for num in range(raw_data.shape[1])]
             raw_data = pd.DataFrame(raw_data, columns=column_names)
 
-        if raw_data.shape[0] < 500:
-            # For smaller data, parallel overhead is bigger than the benefit
-            column_data_list = self._synchronous_transform(raw_data, self._column_transform_info_list)
+        ctinfo_list = self._column_transform_info_list
+        n_continuous = sum(cti.column_type == 'continuous' for cti in ctinfo_list)
+        max_dim = max(cti.output_dimensions for cti in ctinfo_list)
+        codes_dtype = _smallest_int_dtype(max_dim)
+
+        if raw_data.shape[0] >= 500 and self._n_workers() > 1:
+            continuous = _SharedArray((len(raw_data), n_continuous), 'float32')
+            codes = _SharedArray((len(raw_data), len(ctinfo_list)), codes_dtype)
+            try:
+                self._pooled_transform(raw_data, continuous, codes)
+                return EncodedData(
+                    self.output_info_list, np.array(continuous.array), np.array(codes.array)
+                )
+            finally:
+                continuous.close()
+                codes.close()
+
+        # For smaller data, parallel overhead is bigger than the benefit
+        column_data_list = self._synchronous_transform(raw_data, ctinfo_list)
+        continuous = np.empty((len(raw_data), n_continuous), dtype='float32')
+        codes = np.empty((len(raw_data), len(ctinfo_list)), dtype=codes_dtype)
+
+        continuous_id = 0
+        for column_id, (values, column_codes) in enumerate(column_data_list):
+            if values is not None:
+                continuous[:, continuous_id] = values
+                continuous_id += 1
+            codes[:, column_id] = column_codes
+
+        return EncodedData(self.output_info_list, continuous, codes)
+
+    def transform(self, raw_data):
+        """Convert input DataFrame/ndarray to the dense numeric array for SynPro training."""
+        return self.encode(raw_data).to_dense()
+
+    def _inverse_transform_discrete(self, cti, column_data):
+        encoder = self._get_native_encoder(cti)
+        if torch.is_tensor(column_data):
+            codes = column_data.argmax(dim=1).cpu().numpy()
         else:
-            column_data_list = self._parallel_transform(raw_data, self._column_transform_info_list)
+            codes = column_data.argmax(axis=1)
 
-        return np.concatenate(column_data_list, axis=1).astype(float)
+        return encoder.reverse(codes)
 
-    def _inverse_transform_continuous(self, cti, column_data, sigmas, st):
-        gm = cti.transform
-        out_cols = list(gm.get_output_sdtypes())
-        data = pd.DataFrame(column_data[:, :2], columns=out_cols).astype(float)
-        data[data.columns[1]] = np.argmax(column_data[:, 1:], axis=1)
+    def _inverse_transform_columns(self, data, sigmas=None):
+        """
+        Recover every column in its original dtype: a NumPy array, or a
+        Series for pandas extension dtypes such as `category` or `Int64`.
 
+        All continuous columns are decoded together by the batched
+        `ContinuousDecoder`, on the device of `data` when it is a tensor.
+        Discrete columns are decoded one by one, on a thread pool next to the
+        continuous block for 500+ rows.
+        """
+        ctinfo_list = self._column_transform_info_list
+        decoder = self._get_continuous_decoder()
+        noise = None
         if sigmas is not None:
-            selected_normalized_value = np.random.normal(data.iloc[:, 0], sigmas[st])
-            data.iloc[:, 0] = selected_normalized_value
+            # Same draws, in column order, as one `normal(value, sigma)` call per column.
+            sigmas = np.asarray(sigmas, dtype=float)[decoder.value_index]
+            noise = np.random.normal(size=(len(decoder.value_index), len(data))).T * sigmas
 
-        return gm.reverse_transform(data)
-
-    def _inverse_transform_discrete(self, cti, column_data):
-        ohe = cti.transform
-        dummy_cols = list(ohe.get_output_sdtypes())
-        data = pd.DataFrame(column_data, columns=dummy_cols)
-        return ohe.reverse_transform(data)[cti.column_name]
+        discrete_slices = []
+        st = 0
+        for cti in ctinfo_list:
+            if cti.column_type == 'discrete':
+                discrete_slices.append((cti, data[:, st:st + cti.output_dimensions]))
+            st += cti.output_dimensions
+
+        n_workers = min(self._n_workers(), len(discrete_slices) + 1)
+        if len(data) >= 500 and n_workers > 1:
+            with ThreadPoolExecutor(max_workers=n_workers) as executor:
+                continuous = executor.submit(decoder.decode, data, noise)
+                discrete = list(executor.map(
+                    lambda item: self._inverse_transform_discrete(*item), discrete_slices
+                ))
+                continuous = continuous.result()
+        else:
+            continuous = decoder.decode(data, noise)
+            discrete = [self._inverse_transform_discrete(*item) for item in discrete_slices]
+
+        continuous = iter(continuous)
+        discrete = iter(discrete)
+        return [
+            astype(
+                next(continuous if cti.column_type == 'continuous' else discrete),
+                self._column_raw_dtypes[cti.column_name],
+            )
+            for cti in ctinfo_list
+        ]
 
     def inverse_transform(self, data, sigmas=None):
         """
         Convert numeric output back to the original space or DataFrame.
-        """
-        st = 0
-        recovered_cols = []
-        col_names = []
-
-        for cti in self._column_transform_info_list:
-            dim = cti.output_dimensions
-            col_slice = data[:, st: st + dim]
-            if cti.column_type == 'continuous':
-                rec_col = self._inverse_transform_continuous(cti, col_slice, sigmas, st)
-            else:
-                rec_col = self._inverse_transform_discrete(cti, col_slice)
-
-            recovered_cols.append(rec_col)
-            col_names.append(cti.column_name)
-            st += dim
 
-        recovered_data = np.column_stack(recovered_cols)
-        recovered_data = pd.DataFrame(recovered_data, columns=col_names).astype(self._column_raw_dtypes)
+        `data` is a NumPy array or a torch tensor. Continuous columns are
+        decoded together with one segmented arg-max and one gathered
+        denormalization (on the tensor's device for tensors), discrete
+        columns by their NumPy encoders, straight into arrays of the original
+        dtypes.
+        """
+        recovered_cols = self._inverse_transform_columns(data, sigmas)
+        recovered_data = pd.DataFrame(
+            {
+                cti.column_name: column
+                for cti, column in zip(self._column_transform_info_list, recovered_cols)
+            },
+            copy=False,
+        )
 
         if not self.dataframe:
             return recovered_data.to_numpy()
@@ -197,27 +605,46 @@ class DataTransformer:
     def convert_column_name_value_to_id(self, column_name, value):
         """
         Convert (column_name, discrete_value) to
-        (discrete_column_id, column_id, value_id).
+        (discrete_column_id, column_id, value_id), plus the value's position
+        in the conditional vector (`cond_offset`).
+
+        Uses the lookup index built at fit time, so no DataFrame or RDT
+        transform is involved.
         """
-        discrete_counter = 0
-        column_id = 0
-        for cti in self._column_transform_info_list:
-            if cti.column_name == column_name:
-                break
-            if cti.column_type == 'discrete':
-                discrete_counter += 1
-            column_id += 1
+        info = self._get_condition_info(column_name)
+        if pd.isna(value):
+            value_id = next((i for i, category in enumerate(info.categories) if pd.isna(category)), None)
         else:
-            raise ValueError(f"Column name `{column_name}` not found in the data.")
+            value_id = info.value_ids.get(value)
 
-        ohe = cti.transform
-        tmp_df = pd.DataFrame([value], columns=[cti.column_name])
-        one_hot = ohe.transform(tmp_df).to_numpy()[0]
-        if sum(one_hot) == 0:
+        if value_id is None:
             raise ValueError(f"Value `{value}` does not exist in column `{column_name}`.")
 
         return {
-            'discrete_column_id': discrete_counter,
-            'column_id': column_id,
-            'value_id': int(np.argmax(one_hot)),
+            'discrete_column_id': info.discrete_column_id,
+            'column_id': info.column_id,
+            'value_id': value_id,
+            'cond_offset': info.cond_offset + value_id,
+        }
+
+    def convert_column_name_values_to_ids(self, column_name, values):
+        """
+        Bulk version of `convert_column_name_value_to_id` for an array of values.
+
+        Returns:
+            dict:
+                `discrete_column_id` and `column_id` of the column, plus
+                `value_id` and `cond_offset` arrays with one entry per value.
+        """
+        info = self._get_condition_info(column_name)
+        value_ids = info.categories.get_indexer(pd.Index(values, dtype=object))
+        if (value_ids < 0).any():
+            unknown = pd.Index(values, dtype=object)[value_ids < 0].unique()
+            raise ValueError(f"Values {list(unknown[:5])} do not exist in column `{column_name}`.")
+
+        return {
+            'discrete_column_id': info.discrete_column_id,
+            'column_id': info.column_id,
+            'value_id': value_ids,
+            'cond_offset': info.cond_offset + value_ids,
         }
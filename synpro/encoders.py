@@ -0,0 +1,282 @@
+"""
+NumPy encoders for the hot path of the DataTransformer.
+
+RDT's `ClusterBasedNormalizer` and `OneHotEncoder` are still used to fit the
+columns. Their fitted state is exported here into plain arrays, so that
+transform and reverse transform are vectorized NumPy without DataFrames,
+column renames or per-call validation.
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+import torch
+from rdt.transformers.numerical import INTEGER_BOUNDS
+
+_BLOCK_ROWS = 65536
+_DECODE_BLOCK_ROWS = 4096
+
+
+def astype(values, dtype):
+    """
+    Cast a NumPy array to `dtype`.
+
+    Pandas extension dtypes (`category`, `string`, `Int64`, ...) cannot be
+    given to `ndarray.astype`; those values are cast through a Series.
+    """
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype):
+        return pd.Series(values, copy=False).astype(dtype)
+    return values.astype(dtype, copy=False)
+
+
+class ContinuousEncoder:
+    """
+    Vectorized transform/reverse of a fitted ClusterBasedNormalizer.
+
+    The weighted log-likelihood of a 1D Gaussian (Bayesian) mixture
+    component is `offset_k - 0.5 * ((x - mean_k) * precision_k) ** 2`, so
+    component probabilities for a batch are one broadcast expression instead
+    of `predict_proba`. As in RDT, a component is then drawn per row from the
+    probabilities of the valid components plus 1e-6, here by inverse CDF
+    sampling from the global NumPy random state, or from `random_state` when
+    one is given.
+
+    Missing values are replaced by the normalizer's fitted replacement value.
+    """
+
+    def __init__(self, normalizer):
+        bgm = normalizer._bgm_transformer
+        means = bgm.means_.reshape(-1)
+        stds = np.sqrt(bgm.covariances_).reshape(-1)
+        valid = np.asarray(normalizer.valid_component_indicator, dtype=bool)
+
+        self.means = means
+        self.precisions = bgm.precisions_cholesky_.reshape(-1)
+        # weighted log-likelihood of every component at its own mean
+        self.log_prob_offsets = np.diag(bgm._estimate_weighted_log_prob(means.reshape(-1, 1)))
+        self.valid = valid
+        self.valid_means = means[valid]
+        self.valid_scales = normalizer.STD_MULTIPLIER * stds[valid]
+
+        null_transformer = normalizer.null_transformer
+        self.missing_value_replacement = getattr(null_transformer, '_missing_value_replacement', None)
+
+        self.enforce_min_max_values = normalizer.enforce_min_max_values
+        self.min_value = normalizer._min_value
+        self.max_value = normalizer._max_value
+        self.computer_representation = normalizer.computer_representation
+        rounding = normalizer.learn_rounding_scheme and normalizer._rounding_digits is not None
+        self.rounding_digits = normalizer._rounding_digits if rounding else None
+        self.dtype = normalizer._dtype
+
+    def _select_components(self, values, random_state):
+        log_prob = self.log_prob_offsets - 0.5 * ((values[:, None] - self.means) * self.precisions) ** 2
+        prob = np.exp(log_prob - log_prob.max(axis=1, keepdims=True))
+        prob /= prob.sum(axis=1, keepdims=True)
+        cdf = np.cumsum(prob[:, self.valid] + 1e-6, axis=1)
+        draws = random_state.random_sample(len(values)) * cdf[:, -1]
+        component = (cdf < draws[:, None]).sum(axis=1)
+        return np.minimum(component, len(self.valid_means) - 1)
+
+    def transform(self, values, random_state=None):
+        """Return the normalized values (float32) and the selected components."""
+        if random_state is None:
+            random_state = np.random
+
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        missing = np.isnan(values)
+        if missing.any():
+            values = np.where(missing, self.missing_value_replacement, values)
+
+        component = np.empty(len(values), dtype=np.int64)
+        for start in range(0, len(values), _BLOCK_ROWS):
+            block = slice(start, start + _BLOCK_ROWS)
+            component[block] = self._select_components(values[block], random_state)
+
+        normalized = (values - self.valid_means[component]) / self.valid_scales[component]
+        return np.clip(normalized, -0.99, 0.99).astype(np.float32), component
+
+    def reverse(self, normalized, component):
+        """Recover the original values from normalized values and components."""
+        values = np.clip(normalized, -1, 1) * self.valid_scales[component] + self.valid_means[component]
+        return self.format(values)
+
+    def format(self, values):
+        """Clip, round and cast denormalized values as the normalizer's reverse transform does."""
+        if self.enforce_min_max_values:
+            values = values.clip(self.min_value, self.max_value)
+        elif not self.computer_representation.startswith('Float'):
+            values = values.clip(*INTEGER_BOUNDS[self.computer_representation])
+
+        if self.rounding_digits is not None:
+            values = values.round(self.rounding_digits)
+        elif pd.api.types.is_integer_dtype(self.dtype):
+            values = values.round(0)
+
+        return astype(values, self.dtype)
+
+
+class ContinuousDecoder:
+    """
+    Reverse transform of all the continuous columns of the output at once.
+
+    Components of all columns are picked into one (rows, columns) matrix:
+    on torch devices the component logits are gathered into one
+    (rows, columns, max components) block, padded with -inf, and reduced with
+    a single arg-max. Means and scales of the valid
+    components are kept in a matching (columns, max components) table, so
+    denormalizing is one gathered, fused expression for all columns. Works
+    on NumPy arrays and on torch tensors, on the tensor's device; only the
+    per-column formatting (clipping, rounding, dtype) runs afterwards, on
+    the host.
+
+    Args:
+        encoders (list[ContinuousEncoder]):
+            Encoders of the continuous columns, in output order.
+        value_index (list[int]):
+            Output column of the normalized value of every continuous column.
+    """
+
+    def __init__(self, encoders, value_index):
+        self.encoders = encoders
+        self.value_index = np.asarray(value_index, dtype=np.int64)
+        n_components = [len(encoder.valid_means) for encoder in encoders]
+        max_components = max(n_components, default=1)
+
+        self.gather_index = np.zeros((len(encoders), max_components), dtype=np.int64)
+        self.mask = np.zeros((len(encoders), max_components), dtype=bool)
+        self.means = np.zeros((len(encoders), max_components))
+        self.scales = np.zeros((len(encoders), max_components))
+        for i, (encoder, k) in enumerate(zip(encoders, n_components)):
+            self.gather_index[i, :k] = self.value_index[i] + 1 + np.arange(k)
+            self.mask[i, :k] = True
+            self.means[i, :k] = encoder.valid_means
+            self.scales[i, :k] = encoder.valid_scales
+
+        self.component_spans = [(st + 1, st + 1 + k) for st, k in zip(self.value_index, n_components)]
+        # flat position of (column, 0) in the mean/scale tables
+        self.table_offsets = np.arange(len(encoders)) * max_components
+        self._device_cache = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_device_cache'] = {}
+        return state
+
+    def _to(self, device):
+        if device not in self._device_cache:
+            # MPS has no float64
+            dtype = torch.float32 if device.type == 'mps' else torch.float64
+            self._device_cache[device] = (
+                torch.from_numpy(self.value_index).to(device),
+                torch.from_numpy(self.gather_index).to(device),
+                torch.from_numpy(self.mask).to(device),
+                torch.from_numpy(self.means.reshape(-1)).to(device, dtype),
+                torch.from_numpy(self.scales.reshape(-1)).to(device, dtype),
+                torch.from_numpy(self.table_offsets).to(device),
+            )
+        return self._device_cache[device]
+
+    def _denormalize_tensor(self, data, noise):
+        value_index, gather_index, mask, means, scales, offsets = self._to(data.device)
+        logits = data[:, gather_index].masked_fill_(~mask, float('-inf'))
+        flat = logits.argmax(dim=2) + offsets
+        normalized = data[:, value_index].to(means.dtype)
+        if noise is not None:
+            normalized += torch.from_numpy(noise).to(normalized)
+        values = normalized.clamp_(-1, 1).mul_(scales[flat]).add_(means[flat])
+        return values.cpu().numpy()
+
+    def _denormalize_array(self, data, noise):
+        means = self.means.reshape(-1)
+        scales = self.scales.reshape(-1)
+        values = np.empty((len(data), len(self.encoders)))
+        component = np.empty((min(len(data), _DECODE_BLOCK_ROWS), len(self.encoders)), dtype=np.int64)
+        for start in range(0, len(data), _DECODE_BLOCK_ROWS):
+            block = data[start:start + _DECODE_BLOCK_ROWS]
+            rows = len(block)
+            # On the host, NumPy's arg-max is much faster over 2D span views
+            # than over a padded 3D gather, so the component matrix of the
+            # whole block is filled span by span while the block is in cache.
+            for i, (st, ed) in enumerate(self.component_spans):
+                component[:rows, i] = block[:, st:ed].argmax(axis=1)
+
+            flat = component[:rows]
+            flat += self.table_offsets
+            out = values[start:start + rows]
+            out[:] = block[:, self.value_index]
+            if noise is not None:
+                out += noise[start:start + rows]
+            np.clip(out, -1, 1, out=out)
+            out *= np.take(scales, flat)
+            out += np.take(means, flat)
+
+        return values
+
+    def decode(self, data, noise=None):
+        """
+        Recover the continuous columns from (rows, output dimensions) output.
+
+        Args:
+            data (numpy.ndarray or torch.Tensor):
+                Activated generator output, with every column of the table.
+            noise (numpy.ndarray or None):
+                (rows, continuous columns) values added to the normalized
+                values before they are clipped.
+
+        Returns:
+            list[numpy.ndarray]:
+                The recovered values of every continuous column.
+        """
+        if not self.encoders:
+            return []
+
+        if torch.is_tensor(data):
+            values = self._denormalize_tensor(data.detach(), noise)
+        else:
+            values = self._denormalize_array(data, noise)
+
+        return [encoder.format(values[:, i]) for i, encoder in enumerate(self.encoders)]
+
+
+class DiscreteEncoder:
+    """
+    Vectorized transform/reverse of a fitted OneHotEncoder.
+
+    Values are mapped to category indices with a hash lookup
+    (`pandas.Index.get_indexer`). Any missing value (None, NaN, pd.NA) gets
+    the index of the fitted NaN category, and unseen values get index 0, the
+    arg-max of the all-zero vector RDT produces for them.
+    """
+
+    def __init__(self, encoder):
+        self.categories = pd.Index(encoder.dummies, dtype=object)
+        self.dummies = np.empty(len(encoder.dummies), dtype=object)
+        self.dummies[:] = encoder.dummies
+
+    def transform(self, values):
+        """Return the category index of every value."""
+        values = pd.Index(np.asarray(values).reshape(-1), dtype=object)
+        codes = self.categories.get_indexer(values)
+        unseen = codes < 0
+        if unseen.any():
+            # None and pd.NA are the fitted NaN category, as in RDT
+            missing = unseen & pd.isna(values)
+            codes[missing] = self.categories.get_indexer([np.nan])[0]
+            unseen = codes < 0
+
+        if unseen.any():
+            unseen_categories = values[unseen].unique()
+            warnings.warn(
+                f'The data contains {len(unseen_categories)} new categories that were not seen in '
+                f'the original data (examples: {set(unseen_categories[:5])}). They are encoded '
+                'as the first category.'
+            )
+            codes[unseen] = 0
+
+        return codes
+
+    def reverse(self, codes):
+        """Return the categories of the given indices as an object array."""
+        return self.dummies[codes]
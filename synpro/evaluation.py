@@ -0,0 +1,183 @@
+"""
+Fidelity evaluation and early stopping for SynPro training.
+
+`FidelityEvaluator` compares activated generator output with a held-out
+slice of the encoded training data (`EncodedData`), without decoding either
+of them:
+
+- Marginal distance: the total variation distance between the category
+  frequencies of every softmax span (discrete columns and GMM components),
+  and the Kolmogorov-Smirnov statistic of every `tanh` value, averaged.
+- Correlation distance: the mean absolute difference between the pairwise
+  Pearson correlations of the dense encoded columns.
+
+Their sum is the fidelity score (lower is better). `EarlyStopping` tracks
+the score across evaluations, keeps a copy of the training state (networks,
+optimizers and loss scalers) with the best generator and tells the training
+loop when the score stopped improving.
+"""
+
+import copy
+
+import numpy as np
+
+
+def _ks_statistic(real, fake):
+    """Two-sample Kolmogorov-Smirnov statistic of two 1-D arrays."""
+    real = np.sort(real)
+    fake = np.sort(fake)
+    values = np.concatenate([real, fake])
+    cdf_real = np.searchsorted(real, values, side='right') / len(real)
+    cdf_fake = np.searchsorted(fake, values, side='right') / len(fake)
+    return np.abs(cdf_real - cdf_fake).max()
+
+
+def _correlation(data, columns):
+    """Pearson correlation of `columns`; constant columns have zero correlation."""
+    data = data[:, columns].astype('float64')
+    data = data - data.mean(axis=0)
+    norm = np.sqrt((data ** 2).sum(axis=0))
+    norm[norm == 0] = np.inf
+    data = data / norm
+    return data.T @ data
+
+
+class FidelityEvaluator:
+    """
+    Cheap fidelity statistics of generated rows against a held-out slice of the encoded data.
+
+    Args:
+        holdout (EncodedData):
+            Encoded real rows to compare with.
+    """
+
+    def __init__(self, holdout):
+        self._holdout = holdout
+        self._continuous_columns = holdout._continuous_columns
+        self._softmax_spans = []
+        for col_info in holdout.output_info_list:
+            for span_info in col_info:
+                if span_info.activation_fn == 'softmax':
+                    self._softmax_spans.append(span_info.dim)
+
+        self._real_frequencies = [
+            np.bincount(holdout.codes[:, i], minlength=dim) / len(holdout)
+            for i, dim in enumerate(self._softmax_spans)
+        ]
+        dense = holdout.to_dense()
+        # columns that never vary in the held-out rows carry no correlation
+        self._correlation_columns = np.flatnonzero(dense.std(axis=0) > 0)
+        correlation = _correlation(dense, self._correlation_columns)
+        self._upper = np.triu_indices(len(self._correlation_columns), k=1)
+        self._real_correlation = correlation[self._upper]
+
+    def _encode(self, fake):
+        """Activated generator output to the compact `(continuous, codes)` form of `EncodedData`."""
+        continuous = fake[:, self._continuous_columns]
+        codes = np.empty((len(fake), len(self._softmax_spans)), dtype='int64')
+        offsets = self._holdout._softmax_offsets
+        for i, (st, dim) in enumerate(zip(offsets, self._softmax_spans)):
+            codes[:, i] = fake[:, st:st + dim].argmax(axis=1)
+        return continuous, codes
+
+    def evaluate(self, fake):
+        """
+        Fidelity statistics of a batch of activated generator output.
+
+        Args:
+            fake (numpy.ndarray):
+                Activated generator output, shaped like the dense encoded data.
+
+        Returns:
+            dict:
+                `marginal_distance`, `correlation_distance` and their sum,
+                `fidelity_score`.
+        """
+        continuous, codes = self._encode(fake)
+        distances = [
+            0.5 * np.abs(np.bincount(codes[:, i], minlength=len(real)) / len(codes) - real).sum()
+            for i, real in enumerate(self._real_frequencies)
+        ]
+        distances.extend(
+            _ks_statistic(self._holdout.continuous[:, i], continuous[:, i])
+            for i in range(continuous.shape[1])
+        )
+        marginal_distance = float(np.mean(distances))
+
+        correlation_distance = 0.0
+        if len(self._real_correlation):
+            dense = np.zeros_like(fake, dtype='float32')
+            dense[:, self._continuous_columns] = continuous
+            dense[np.arange(len(codes))[:, None], self._holdout._softmax_offsets + codes] = 1.0
+            fake_correlation = _correlation(dense, self._correlation_columns)[self._upper]
+            correlation_distance = float(np.abs(fake_correlation - self._real_correlation).mean())
+
+        return {
+            'marginal_distance': marginal_distance,
+            'correlation_distance': correlation_distance,
+            'fidelity_score': marginal_distance + correlation_distance,
+        }
+
+
+class EarlyStopping:
+    """
+    Keep the training state of the best generator and stop when the fidelity score plateaus.
+
+    Args:
+        patience (int):
+            Number of evaluations without an improvement of at least
+            `min_delta` after which training stops.
+        min_delta (float):
+            Smallest decrease of the fidelity score counted as an improvement.
+    """
+
+    def __init__(self, patience=3, min_delta=1e-3):
+        self.patience = patience
+        self.min_delta = min_delta
+        self.best_score = float('inf')
+        self.best_epoch = None
+        self.best_state = None
+        self._bad_evaluations = 0
+
+    def update(self, score, epoch, state):
+        """
+        Record the score of the generator after `epoch`.
+
+        `state` maps names to the objects making up the training state
+        (networks, optimizers, loss scalers); all of their `state_dict`s are
+        copied when the score improves, so that restoring them keeps the
+        discriminator and optimizers in step with the generator.
+
+        Returns:
+            bool:
+                Whether training should stop.
+        """
+        if score < self.best_score - self.min_delta:
+            self.best_score = score
+            self.best_epoch = epoch
+            self.best_state = {name: copy.deepcopy(obj.state_dict()) for name, obj in state.items()}
+            self._bad_evaluations = 0
+        else:
+            self._bad_evaluations += 1
+
+        return self._bad_evaluations >= self.patience
+
+    def state_dict(self):
+        return {
+            'best_score': self.best_score,
+            'best_epoch': self.best_epoch,
+            'best_state': self.best_state,
+            'bad_evaluations': self._bad_evaluations,
+        }
+
+    def load_state_dict(self, state):
+        self.best_score = state['best_score']
+        self.best_epoch = state['best_epoch']
+        self.best_state = state['best_state']
+        self._bad_evaluations = state['bad_evaluations']
+
+    def restore(self, state):
+        """Load the best training state seen into the objects of `state`, if any."""
+        if self.best_state is not None:
+            for name, obj in state.items():
+                obj.load_state_dict(self.best_state[name])
@@ -0,0 +1,117 @@
+"""
+Adversarial losses of SynPro.
+
+`make_adv_loss` turns the `adv_loss` name into a strategy object once per
+fit, so the training step calls its methods instead of comparing strings on
+every iteration:
+
+- `discriminator_inputs` gives the rows of the step's single discriminator
+  forward and, on regularized steps, the input the penalty is taken from.
+- `discriminator_loss` and `generator_loss` are the adversarial terms.
+- `penalty` is the gradient penalty of losses with `regularized = True`.
+"""
+
+import torch
+from torch.nn import functional as F
+
+
+class AdversarialLoss:
+    """Wasserstein critic loss without a gradient penalty; base of the other losses."""
+
+    name = None
+    # whether `penalty` is defined, i.e. regularized steps need input gradients
+    regularized = False
+
+    def discriminator_inputs(self, discriminator, real, fake, regularize):
+        """Rows of the discriminator forward (real first, then fake) and the penalty input, or None."""
+        return [real, fake], None
+
+    def discriminator_loss(self, d_real, d_fake):
+        return -(torch.mean(d_real) - torch.mean(d_fake))
+
+    def generator_loss(self, y_fake):
+        return -torch.mean(y_fake)
+
+    def penalty(self, discriminator, penalty_input, penalty_scores, d_real, grad_scale=None):
+        """
+        Gradient penalty of a regularized step; zero for unregularized losses.
+
+        `penalty_scores` are the discriminator outputs of the rows after the
+        real and fake ones; `grad_scale` is the fp16 loss scale, or None.
+        """
+        return d_real.new_zeros(())
+
+
+class WGANGPLoss(AdversarialLoss):
+    """WGAN-GP: Wasserstein loss with a gradient penalty on real/fake interpolates."""
+
+    name = 'wgan-gp'
+    regularized = True
+
+    def __init__(self, gp_lambda=10.0):
+        self.gp_lambda = gp_lambda
+
+    def discriminator_inputs(self, discriminator, real, fake, regularize):
+        if not regularize:
+            return [real, fake], None
+
+        interpolates = discriminator.interpolate(real, fake)
+        return [real, fake, interpolates], interpolates
+
+    def penalty(self, discriminator, penalty_input, penalty_scores, d_real, grad_scale=None):
+        return discriminator.wgan_gp_penalty(penalty_input, penalty_scores, self.gp_lambda, grad_scale)
+
+
+class R1Loss(AdversarialLoss):
+    """Wasserstein loss with the R1 penalty on the gradients at the real rows."""
+
+    name = 'r1'
+    regularized = True
+
+    def __init__(self, r1_gamma=10.0):
+        self.r1_gamma = r1_gamma
+
+    def discriminator_inputs(self, discriminator, real, fake, regularize):
+        if not regularize:
+            return [real, fake], None
+
+        real = real.detach().requires_grad_(True)
+        return [real, fake], real
+
+    def penalty(self, discriminator, penalty_input, penalty_scores, d_real, grad_scale=None):
+        return 0.5 * self.r1_gamma * discriminator.calc_gradient_penalty_r1(penalty_input, d_real, grad_scale)
+
+
+class HingeLoss(AdversarialLoss):
+    """Hinge loss; the generator loss is also -E[D(fake)]."""
+
+    name = 'hinge'
+
+    def discriminator_loss(self, d_real, d_fake):
+        return torch.mean(F.relu(1.0 - d_real)) + torch.mean(F.relu(1.0 + d_fake))
+
+
+def make_adv_loss(adv_loss, gp_lambda=10.0, r1_gamma=10.0):
+    """
+    Build the adversarial loss named `adv_loss`.
+
+    Args:
+        adv_loss (str):
+            'wgan-gp', 'r1' or 'hinge'.
+        gp_lambda (float):
+            Gradient penalty weight of 'wgan-gp'.
+        r1_gamma (float):
+            Penalty weight of 'r1'.
+
+    Returns:
+        AdversarialLoss:
+            The loss strategy.
+    """
+    if adv_loss == 'wgan-gp':
+        return WGANGPLoss(gp_lambda)
+    if adv_loss == 'r1':
+        return R1Loss(r1_gamma)
+    if adv_loss == 'hinge':
+        return HingeLoss()
+
+    raise ValueError(f"Unsupported adv_loss: {adv_loss}")
@@ -3,7 +3,12 @@ SynPro Model: Enhanced version with optional spectral norm,
 multiple GAN losses (wgan-gp, r1, hinge), and mixed-precision training.
 """
 
+import contextlib
+import copy
+import os
+import time
 import warnings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import numpy as np
 import pandas as pd
 import torch
@@ -11,12 +16,18 @@ from torch import nn, optim
 from torch.nn import functional as F
 from torch.nn.utils import spectral_norm
 from tqdm import tqdm
-from torch.cuda.amp import autocast, GradScaler
 
 from synpro.base import BaseSynthesizer, random_state
-from synpro.data_sampler import DataSampler
-from synpro.data_transformer import DataTransformer
+from synpro.data_sampler import DataSampler, DeviceDataSampler, count_categories
+from synpro.data_stream import (
+    ChunkedDataSampler, iter_data_chunks, open_chunk_writer, reservoir_sample
+)
+from synpro.data_transformer import DataTransformer, EncodedData
 from synpro.errors import InvalidDataError
+from synpro.evaluation import EarlyStopping, FidelityEvaluator
+from synpro.losses import make_adv_loss
+from synpro.profiling import Profiler, profile_range
+from synpro.telemetry import TrainingTelemetry, make_sinks
 
 
 def apply_spectral_norm_if_enabled(module, enable_spectral_norm):
@@ -58,39 +69,52 @@ class Discriminator(nn.Module):
         if enable_spectral_norm:
             apply_spectral_norm_if_enabled(self.seq, True)
 
-    def calc_gradient_penalty_wgan_gp(self, real_data, fake_data, device='cpu', lambda_=10):
-        """WGAN-GP gradient penalty."""
-        alpha = torch.rand(real_data.size(0), 1, device=device)
-        alpha = alpha.expand(real_data.size())
-        interpolates = alpha * real_data + ((1 - alpha) * fake_data)
-        interpolates.requires_grad_(True)
-
-        disc_interpolates = self(interpolates)
-        grad_outputs = torch.ones(disc_interpolates.size(), device=device)
-        gradients = torch.autograd.grad(
-            outputs=disc_interpolates,
-            inputs=interpolates,
-            grad_outputs=grad_outputs,
-            create_graph=True,
-            retain_graph=True,
-            only_inputs=True
-        )[0]
+    @staticmethod
+    def interpolate(real_data, fake_data):
+        """Random points between real and fake rows (one mixing weight per row), requiring grad."""
+        alpha = torch.rand(real_data.size(0), 1, device=real_data.device, dtype=real_data.dtype)
+        interpolates = alpha * real_data + (1 - alpha) * fake_data
+        return interpolates.requires_grad_(True)
+
+    @staticmethod
+    def _input_gradients(outputs, inputs, grad_scale):
+        # Under fp16 AMP the output is scaled before differentiating, so small
+        # gradients do not flush to zero, and the gradients are unscaled
+        # before any penalty is computed from them.
+        outputs = outputs.sum()
+        if grad_scale is not None:
+            outputs = outputs * grad_scale
+        gradients = torch.autograd.grad(outputs=outputs, inputs=inputs, create_graph=True)[0]
+        if grad_scale is not None:
+            gradients = gradients / grad_scale
+        return gradients.float()
+
+    @classmethod
+    def wgan_gp_penalty(cls, interpolates, disc_interpolates, lambda_=10, grad_scale=None):
+        """
+        WGAN-GP penalty from the discriminator output on `interpolates`.
 
+        `grad_scale` is the loss scale of the GradScaler, when training with fp16.
+        """
+        gradients = cls._input_gradients(disc_interpolates, interpolates, grad_scale)
         gradient_norm = gradients.view(gradients.size(0), -1).norm(2, dim=1)
-        gradient_penalty = ((gradient_norm - 1) ** 2).mean() * lambda_
-        return gradient_penalty
+        return ((gradient_norm - 1) ** 2).mean() * lambda_
+
+    def calc_gradient_penalty_wgan_gp(self, real_data, fake_data, device='cpu', lambda_=10):
+        """WGAN-GP gradient penalty."""
+        interpolates = self.interpolate(real_data, fake_data)
+        return self.wgan_gp_penalty(interpolates, self(interpolates), lambda_)
 
-    def calc_gradient_penalty_r1(self, real_data, d_real):
+    def calc_gradient_penalty_r1(self, real_data, d_real, grad_scale=None):
         """
         R1 regularization (https://arxiv.org/abs/1801.04406).
         Typically you do gamma/2 * E[|| grad D(real_data)||^2].
         We'll incorporate gamma factor externally if needed.
+
+        `real_data` must require grad and `d_real` be computed from it.
+        `grad_scale` is the loss scale of the GradScaler, when training with fp16.
         """
-        grad_real = torch.autograd.grad(
-            outputs=d_real.sum(),
-            inputs=real_data,
-            create_graph=True
-        )[0]
+        grad_real = self._input_gradients(d_real, real_data, grad_scale)
         grad_penalty = grad_real.view(grad_real.size(0), -1).pow(2).sum(dim=1).mean()
         return grad_penalty
 
@@ -146,13 +170,336 @@ class Generator(nn.Module):
         return self.seq(x)
 
 
+def _effective_linear(layer):
+    """Weight and bias a (possibly spectral-normalized) Linear applies in eval mode."""
+    weight = layer.weight
+    if hasattr(layer, 'weight_orig'):
+        weight_mat = layer.weight_orig.reshape(layer.weight_orig.size(0), -1)
+        sigma = torch.dot(layer.weight_u, torch.mv(weight_mat, layer.weight_v))
+        weight = layer.weight_orig / sigma
+    return weight, layer.bias
+
+
+class InferenceGenerator(nn.Module):
+    """
+    Frozen eval-mode copy of a trained Generator.
+
+    The BatchNorm1d of every Residual block is folded into the preceding
+    Linear using its running statistics, so each block is a single affine
+    map followed by ReLU. All parameters are detached copies with
+    `requires_grad=False`; the trained Generator is left untouched.
+    """
+
+    def __init__(self, generator):
+        super().__init__()
+        blocks = []
+        with torch.no_grad():
+            for layer in generator.seq:
+                if isinstance(layer, Residual):
+                    weight, bias = _effective_linear(layer.fc)
+                    bn = layer.bn
+                    scale = bn.weight / torch.sqrt(bn.running_var + bn.eps)
+                    fused = nn.Linear(weight.size(1), weight.size(0))
+                    fused.weight.copy_(weight * scale[:, None])
+                    fused.bias.copy_((bias - bn.running_mean) * scale + bn.bias)
+                    blocks.append(fused)
+                else:
+                    weight, bias = _effective_linear(layer)
+                    output = nn.Linear(weight.size(1), weight.size(0))
+                    output.weight.copy_(weight)
+                    output.bias.copy_(bias)
+
+        self.blocks = nn.ModuleList(blocks)
+        self.output = output
+        # width of the noise + conditional vector input, also without any block
+        self.in_features = output.in_features - sum(block.out_features for block in blocks)
+        self.to(next(generator.parameters()).device)
+        self.requires_grad_(False)
+        self.eval()
+
+    def forward(self, x):
+        # Every block writes its output into one preallocated buffer instead of
+        # concatenating the growing input again at each block.
+        width = x.size(1) + sum(block.out_features for block in self.blocks)
+        dtype = x.dtype
+        if torch.is_autocast_enabled(x.device.type):
+            # keep the buffer in the autocast dtype instead of casting every block back
+            dtype = torch.get_autocast_dtype(x.device.type)
+        hidden = x.new_empty(x.size(0), width, dtype=dtype)
+        end = x.size(1)
+        hidden[:, :end] = x
+        for block in self.blocks:
+            hidden[:, end:end + block.out_features] = F.linear(
+                hidden[:, :end], block.weight, block.bias
+            ).relu_()
+            end += block.out_features
+        return self.output(hidden)
+
+
+class OutputLayout:
+    """
+    Precomputed span layout of the generator output.
+
+    Built once from `DataTransformer.output_info_list`. All `tanh` columns are
+    gathered with one index, and `softmax` spans are grouped by width so each
+    group is activated with a single batched gumbel-softmax over a
+    (batch, n_spans, width) view. `inverse` puts the activated pieces back in
+    the original column order.
+
+    Discrete columns are also flattened into one gather index
+    (`discrete_columns`) with the discrete column id of every category
+    (`discrete_segment`), so the conditional loss is computed for all
+    columns at once with segment reductions instead of one cross entropy
+    per column.
+    """
+
+    def __init__(self, output_info_list):
+        tanh_columns = []
+        softmax_spans = {}
+        discrete_spans = []
+        st = 0
+        for col_info in output_info_list:
+            if len(col_info) == 1 and col_info[0].activation_fn == 'softmax':
+                discrete_spans.append((st, col_info[0].dim))
+
+            for span_info in col_info:
+                ed = st + span_info.dim
+                if span_info.activation_fn == 'tanh':
+                    tanh_columns.extend(range(st, ed))
+                elif span_info.activation_fn == 'softmax':
+                    softmax_spans.setdefault(span_info.dim, []).append(list(range(st, ed)))
+                else:
+                    raise ValueError(f"Unknown activation {span_info.activation_fn}.")
+                st = ed
+
+        self.tanh_index = torch.tensor(tanh_columns, dtype=torch.long)
+        self.softmax_groups = [
+            torch.tensor(spans, dtype=torch.long) for _, spans in sorted(softmax_spans.items())
+        ]
+        order = torch.cat([self.tanh_index] + [group.flatten() for group in self.softmax_groups])
+        self.inverse = torch.argsort(order)
+
+        self.n_discrete = len(discrete_spans)
+        self.discrete_columns = torch.tensor(
+            [column for st, dim in discrete_spans for column in range(st, st + dim)],
+            dtype=torch.long,
+        )
+        self.discrete_segment = torch.repeat_interleave(
+            torch.arange(self.n_discrete), torch.tensor([dim for _, dim in discrete_spans], dtype=torch.long)
+        )
+        widths = torch.bincount(self.discrete_segment, minlength=self.n_discrete)
+        self.discrete_first = torch.cumsum(widths, 0) - widths
+        self._device_cache = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_device_cache'] = {}
+        return state
+
+    def to(self, device):
+        """Copy of the layout with its index tensors on `device`, cached per device."""
+        if device not in self._device_cache:
+            # normal tensors even when first used under inference mode, so the
+            # cached copy can be used for training too
+            with torch.inference_mode(False):
+                layout = copy.copy(self)
+                for name, value in self.__dict__.items():
+                    if torch.is_tensor(value):
+                        setattr(layout, name, value.to(device))
+                layout.softmax_groups = [group.to(device) for group in self.softmax_groups]
+            self._device_cache[device] = layout
+        return self._device_cache[device]
+
+
+class _TrainStep:
+    """
+    One training step of SynPro: `discriminator_steps` discriminator updates
+    followed by one generator update.
+
+    Built once per fit around the networks, optimizers, GradScalers and
+    adversarial loss strategy, so the training loop only calls it with the
+    current window of data. Every discriminator update runs the real, fake
+    (and WGAN-GP interpolate) rows through one discriminator forward; on
+    regularized updates the penalty is scaled by `reg_interval` (lazy
+    regularization) and, with fp16, taken at the loss scale of the
+    discriminator's GradScaler.
+
+    With `compile=True` the forward and loss computation of the updates run
+    through `torch.compile` (`mode='reduce-overhead'`, i.e. CUDA graphs, on
+    GPUs). Regularized discriminator updates stay eager, because compiled
+    graphs do not support the double backward of gradient penalties, and so
+    does the whole step while a `Profiler` is active.
+    """
+
+    def __init__(self, model, discriminator, optimizer_d, optimizer_g, scaler_d, scaler_g,
+                 adv_loss, reg_interval=1, compile=False):
+        self._model = model
+        self._generator = model._generator
+        self._discriminator = discriminator
+        self._optimizer_d = optimizer_d
+        self._optimizer_g = optimizer_g
+        self._scaler_d = scaler_d
+        self._scaler_g = scaler_g
+        self._adv_loss = adv_loss
+        self._reg_interval = reg_interval
+        self._discriminator_steps = model._discriminator_steps
+        self._profiler = getattr(model, '_profiler', None)
+        self._telemetry = model.telemetry
+        self._mean = torch.zeros(model._batch_size, model._embedding_dim, device=model._device)
+        self._std = self._mean + 1
+        self._d_step = 0
+
+        self._discriminator_forward = self._discriminator_loss
+        self._generator_forward = self._generator_loss
+        if compile and self._profiler is None:
+            # fill the layout's device cache first, so its lookup does not trigger a recompile
+            model._get_output_layout().to(next(discriminator.parameters()).device)
+            mode = 'reduce-overhead' if model._device.type == 'cuda' else None
+            self._discriminator_forward = torch.compile(self._discriminator_loss, mode=mode)
+            self._generator_forward = torch.compile(self._generator_loss, mode=mode)
+
+    def _discriminator_loss(self, fakez, real, c1, c2, regularize):
+        profiler = self._profiler
+        discriminator = self._discriminator
+        with self._model._autocast():
+            # the generator only provides inputs here, so no graph is built for it
+            with torch.no_grad():
+                with profile_range(profiler, 'generator'):
+                    fake = self._generator(fakez)
+                fake = self._model._apply_activate(fake)
+
+            if c1 is not None:
+                fake = torch.cat([fake, c1], dim=1)
+                real = torch.cat([real, c2], dim=1)
+
+            # trimmed to whole packs, so every pack holds only real or only fake rows
+            n_rows = real.size(0) - real.size(0) % discriminator.pac
+            n_packs = n_rows // discriminator.pac
+            parts, penalty_input = self._adv_loss.discriminator_inputs(
+                discriminator, real[:n_rows], fake[:n_rows], regularize
+            )
+            with profile_range(profiler, 'discriminator'):
+                scores = discriminator(torch.cat(parts, dim=0))
+            scores = scores.float()
+            d_real = scores[:n_packs]
+            loss_d = self._adv_loss.discriminator_loss(d_real, scores[n_packs:2 * n_packs])
+
+            if penalty_input is not None:
+                grad_scale = None
+                if self._scaler_d.is_enabled():
+                    # the scale as a tensor, without the device sync of get_scale()
+                    grad_scale = self._scaler_d.scale(torch.ones((), device=scores.device))
+
+                with profile_range(profiler, 'gradient_penalty'):
+                    penalty = self._adv_loss.penalty(
+                        discriminator, penalty_input, scores[2 * n_packs:], d_real, grad_scale
+                    )
+                loss_d = loss_d + self._reg_interval * penalty
+
+        return loss_d
+
+    def _generator_loss(self, fakez, c1, m1):
+        profiler = self._profiler
+        with self._model._autocast():
+            with profile_range(profiler, 'generator'):
+                fake = self._generator(fakez)
+            fakeact = self._model._apply_activate(fake)
+            if c1 is not None:
+                fakeact = torch.cat([fakeact, c1], dim=1)
+            with profile_range(profiler, 'discriminator'):
+                y_fake = self._discriminator(fakeact)
+
+            loss_g = self._adv_loss.generator_loss(y_fake.float())
+            if c1 is not None:
+                with profile_range(profiler, 'cond_loss'):
+                    loss_g = loss_g + self._model._cond_loss(fake, c1, m1)
+        return loss_g
+
+    def _update(self, loss, optimizer, scaler):
+        with self._telemetry.phase('backward'), profile_range(self._profiler, 'backward'):
+            optimizer.zero_grad(set_to_none=True)
+            scaler.scale(loss).backward()
+        with self._telemetry.phase('optimizer'), profile_range(self._profiler, 'optimizer'):
+            scaler.step(optimizer)
+            scaler.update()
+
+    def __call__(self, train_data, data_sampler):
+        """
+        Run one step on batches sampled from `train_data` / `data_sampler`.
+
+        Returns:
+            tuple:
+                Generator and (last) discriminator loss, as device tensors.
+        """
+        model = self._model
+        telemetry = self._telemetry
+        for _ in range(self._discriminator_steps):
+            with telemetry.phase('sampler'):
+                fakez, c1, _, real, c2 = model._sample_batch(train_data, data_sampler, self._mean, self._std)
+
+            # lazy regularization: the penalty is applied every `reg_interval` steps
+            regularize = self._adv_loss.regularized and self._d_step % self._reg_interval == 0
+            self._d_step += 1
+            forward = self._discriminator_loss if regularize else self._discriminator_forward
+            with telemetry.phase('forward'):
+                loss_d = forward(fakez, real, c1, c2, regularize)
+            self._update(loss_d, self._optimizer_d, self._scaler_d)
+
+        with telemetry.phase('sampler'):
+            fakez, c1, m1, _, _ = model._sample_batch(
+                train_data, data_sampler, self._mean, self._std, with_real=False
+            )
+        with telemetry.phase('forward'):
+            loss_g = self._generator_forward(fakez, c1, m1)
+        self._update(loss_g, self._optimizer_g, self._scaler_g)
+
+        return loss_g, loss_d
+
+
+_SAMPLE_SHARD_ROWS = 20_000
+_EVALUATION_METRICS = ('marginal_distance', 'correlation_distance', 'fidelity_score', 'evaluation_seconds')
+_sampling_model = None
+
+
+def _init_sample_worker(state, n_threads):
+    """Build the read-only sampling model of a worker process."""
+    global _sampling_model
+    torch.set_num_threads(n_threads)
+    _sampling_model = SynPro.__new__(SynPro)
+    _sampling_model.__dict__.update(state)
+
+
+def _sample_shard_task(n_rows, seed, global_cond_vec, batch_size, cond):
+    return _sampling_model._sample_shard(n_rows, seed, global_cond_vec, batch_size, cond)
+
+
 class SynPro(BaseSynthesizer):
     """
     SynPro: A next-level synthesizer with advanced features:
 
     - Choice of adversarial loss: wgan-gp, r1, or hinge.
+    - One discriminator forward per step for real, fake (and WGAN-GP
+      interpolate) rows, with optional lazy regularization (`reg_interval`).
+      The loss is chosen once per fit and the whole discriminator+generator
+      step can be compiled (`compile_train_step=True`).
     - Optional spectral normalization in the discriminator (and generator if desired).
-    - Mixed-precision training for faster GPU training.
+    - Mixed-precision training and sampling (`mixed_precision`): fp16 with one
+      GradScaler per optimizer, or bf16 (also on CPU).
+    - Optional device-resident training data (`data_on_device=True`): the
+      encoded training set is uploaded once and batches are sampled with
+      torch ops on the model's device.
+    - Sampling through a frozen copy of the generator with BatchNorm folded
+      into the Linear layers, optionally compiled (`compile_generator=True`).
+    - Training telemetry (`model.telemetry`): step losses pulled from the
+      device without syncs, per-phase timings and rows/sec, optionally sent
+      to CSV/JSONL/callback sinks every epoch (`telemetry=...`).
+    - Optional early stopping (`eval_interval=N`): every N epochs the
+      generator is scored against held-out rows of the encoded data, training
+      stops once the score plateaus and the training state of the best
+      generator is kept (`best_epoch`).
+    - Checkpoints of the full training state (`checkpoint_path`), resumable
+      with `fit(..., resume=path)`, and warm-start training of a fitted model
+      on new data (`partial_fit`).
     """
 
     def __init__(
@@ -175,7 +522,21 @@ class SynPro(BaseSynthesizer):
         gp_lambda=10.0,              # gradient penalty lambda for wgan-gp
         r1_gamma=10.0,               # r1 penalty gamma
         enable_spectral_norm=False,
-        mixed_precision=False        # enable AMP for faster GPU training
+        mixed_precision=False,       # AMP: True, 'fp16' or 'bf16' (True: fp16 on GPU, bf16 on CPU)
+        data_on_device=False,        # keep training data and batch sampling on the device
+        transformer_n_jobs=None,     # workers fitting and transforming columns (None: sequential, -1: all cores)
+        transformer_max_fit_rows=None,  # cap on the rows used to fit each continuous column's GMM
+        transformer_cache_dir=None,  # directory caching fitted continuous columns across runs
+        compile_generator=False,     # torch.compile the inference generator used for sampling
+        reg_interval=1,              # apply the wgan-gp/r1 penalty every k discriminator steps (lazy regularization)
+        compile_train_step=False,    # torch.compile the training step (CUDA graphs on GPUs)
+        telemetry=None,              # epoch telemetry sink(s): .csv/.jsonl path, callable or sink object
+        checkpoint_path=None,        # file the full training state is saved to, for fit(..., resume=path)
+        checkpoint_interval=10,      # epochs between two checkpoints (the last epoch is always saved)
+        eval_interval=None,          # score fidelity on held-out rows every N epochs and stop early (None: off)
+        eval_rows=2000,              # held-out rows used for the fidelity evaluation
+        patience=3,                  # evaluations without improvement before training stops
+        min_delta=1e-3               # smallest decrease of the fidelity score counted as an improvement
     ):
         super().__init__()
 
@@ -200,8 +561,24 @@ class SynPro(BaseSynthesizer):
         self._adv_loss = adv_loss
         self._gp_lambda = gp_lambda
         self._r1_gamma = r1_gamma
+        self._reg_interval = reg_interval
         self._enable_spectral_norm = enable_spectral_norm
+        if mixed_precision not in (False, None, True, 'fp16', 'bf16'):
+            raise ValueError("`mixed_precision` must be False, True, 'fp16' or 'bf16'.")
         self._mixed_precision = mixed_precision
+        self._data_on_device = data_on_device
+        self._transformer_n_jobs = transformer_n_jobs
+        self._transformer_max_fit_rows = transformer_max_fit_rows
+        self._transformer_cache_dir = transformer_cache_dir
+        self._compile_generator = compile_generator
+        self._compile_train_step = compile_train_step
+        self._telemetry_sinks = telemetry
+        self._eval_interval = eval_interval
+        self._eval_rows = eval_rows
+        self._patience = patience
+        self._min_delta = min_delta
+        self._checkpoint_path = checkpoint_path
+        self._checkpoint_interval = checkpoint_interval
 
         if not cuda or not torch.cuda.is_available():
             device = 'cpu'
@@ -214,70 +591,86 @@ class SynPro(BaseSynthesizer):
         self._transformer = None
         self._data_sampler = None
         self._generator = None
-        self.loss_values = None
-
-        # We'll use a GradScaler if mixed_precision is True
-        self._scaler = GradScaler() if self._mixed_precision else None
+        self._discriminator = None
+        self._optimizer_g = None
+        self._optimizer_d = None
+        self._inference_generator = None
+        self._output_layout = None
+        self._profiler = None
+        self.telemetry = None
+        self._scaler_d = None
+        self._scaler_g = None
+        self.best_epoch = None
 
     @staticmethod
-    def _gumbel_softmax(logits, tau=1, hard=False, eps=1e-10, dim=-1):
-        # Retry a few times to avoid NaNs
-        for _ in range(10):
-            out = F.gumbel_softmax(logits, tau=tau, hard=hard, eps=eps, dim=dim)
-            if not torch.isnan(out).any():
-                return out
-        raise ValueError("gumbel_softmax returning NaN repeatedly.")
-
-    def _apply_activate(self, data):
+    def _gumbel_softmax(logits, tau=1, hard=False, eps=1e-10, dim=-1, generator=None):
+        """
+        Gumbel-softmax without a NaN check.
+
+        The uniform noise is clamped away from 0, so the Gumbel noise is always
+        finite and no retry loop (and device sync) is needed.
+        """
+        uniform = torch.rand(
+            logits.shape, dtype=logits.dtype, device=logits.device, generator=generator
+        ).clamp_(min=eps)
+        gumbels = -torch.log(-torch.log(uniform))
+        y_soft = ((logits + gumbels) / tau).softmax(dim)
+        if not hard:
+            return y_soft
+
+        index = y_soft.argmax(dim, keepdim=True)
+        y_hard = torch.zeros_like(logits).scatter_(dim, index, 1.0)
+        return y_hard - y_soft.detach() + y_soft
+
+    def _get_output_layout(self):
+        layout = getattr(self, '_output_layout', None)
+        if layout is None:
+            with torch.inference_mode(False):
+                layout = self._output_layout = OutputLayout(self._transformer.output_info_list)
+        return layout
+
+    def _apply_activate(self, data, generator=None):
         """Map generator output to final space (tanh or softmax)."""
-        out = []
-        st = 0
-        for col_info in self._transformer.output_info_list:
-            for span_info in col_info:
-                if span_info.activation_fn == 'tanh':
-                    ed = st + span_info.dim
-                    out.append(torch.tanh(data[:, st:ed]))
-                    st = ed
-                elif span_info.activation_fn == 'softmax':
-                    ed = st + span_info.dim
-                    chunk = self._gumbel_softmax(data[:, st:ed], tau=0.2)
-                    out.append(chunk)
-                    st = ed
-                else:
-                    raise ValueError(f"Unknown activation {span_info.activation_fn}.")
-        return torch.cat(out, dim=1)
+        with profile_range(getattr(self, '_profiler', None), 'apply_activate'):
+            # in float32 under autocast too, so the Gumbel noise keeps its precision
+            data = data.float()
+            layout = self._get_output_layout().to(data.device)
+            out = [torch.tanh(data[:, layout.tanh_index])]
+            for group in layout.softmax_groups:
+                # (batch, n_spans, width) view of all softmax spans of this width
+                chunk = self._gumbel_softmax(data[:, group], tau=0.2, generator=generator)
+                out.append(chunk.flatten(1))
+            return torch.cat(out, dim=1)[:, layout.inverse]
 
     def _cond_loss(self, data, c, m):
         """
         Cross entropy loss on the discrete columns for which we conditioned.
         """
-        losses = []
-        st_data = 0
-        st_cond = 0
-        for col_info in self._transformer.output_info_list:
-            # If discrete
-            if len(col_info) == 1 and col_info[0].activation_fn == 'softmax':
-                span = col_info[0].dim
-                ed_data = st_data + span
-                ed_cond = st_cond + span
-
-                cross_ent = F.cross_entropy(
-                    data[:, st_data:ed_data],
-                    torch.argmax(c[:, st_cond:ed_cond], dim=1),
-                    reduction='none'
-                )
-                losses.append(cross_ent)
-                st_data = ed_data
-                st_cond = ed_cond
-            else:
-                # If continuous or multi-chunk column
-                span = sum(sp.dim for sp in col_info)
-                st_data += span
-        if not losses:
+        layout = self._get_output_layout().to(data.device)
+        if layout.n_discrete == 0:
             return 0
 
+        data = data.float()
+        # Segment log-softmax over the discrete spans: (batch, #categories)
+        # values reduced into (batch, #discrete columns).
+        x = data.index_select(1, layout.discrete_columns)
+        segment = layout.discrete_segment
+        shape = (data.size(0), layout.n_discrete)
+        x_max = x.detach().new_full(shape, float('-inf')).scatter_reduce(
+            1, segment.expand_as(x), x.detach(), reduce='amax'
+        )
+        sum_exp = x.new_zeros(shape).index_add(1, segment, (x - x_max.index_select(1, segment)).exp())
+        log_sum_exp = sum_exp.log() + x_max
+
+        # Logit of the conditioned category; columns without one fall back to
+        # their first category, like torch.argmax over an all-zero span.
+        c = c[:, :x.size(1)]
+        chosen = x.new_zeros(shape).index_add(1, segment, x * c)
+        has_target = c.new_zeros(shape).index_add(1, segment, c)
+        chosen = chosen + (1 - has_target) * x.index_select(1, layout.discrete_first)
+
         # (batch, #discrete columns)
-        losses = torch.stack(losses, dim=1)
+        losses = log_sum_exp - chosen
         return (losses * m).sum() / data.size(0)
 
     def _validate_discrete_columns(self, train_data, discrete_columns):
@@ -308,8 +701,15 @@ class SynPro(BaseSynthesizer):
             )
 
     @random_state
-    def fit(self, train_data, discrete_columns=(), epochs=None):
-        """Train the SynPro model on data with advanced features."""
+    def fit(self, train_data, discrete_columns=(), epochs=None, resume=None):
+        """
+        Train the SynPro model on data with advanced features.
+
+        `resume` is the path of a checkpoint written by an interrupted `fit`
+        on the same data (see `checkpoint_path`): its transformer, networks,
+        optimizer, scaler and random states are restored and training
+        continues from the saved epoch.
+        """
         self._validate_discrete_columns(train_data, discrete_columns)
         self._validate_null_data(train_data, discrete_columns)
 
@@ -322,11 +722,262 @@ class SynPro(BaseSynthesizer):
             )
 
         # Transform data
-        self._transformer = DataTransformer()
-        self._transformer.fit(train_data, discrete_columns)
-        train_data = self._transformer.transform(train_data)
-        self._data_sampler = DataSampler(train_data, self._transformer.output_info_list, self._log_frequency)
+        checkpoint = None
+        if resume is None:
+            self._transformer = self._make_transformer()
+            self._transformer.fit(train_data, discrete_columns)
+        else:
+            checkpoint = self._read_checkpoint(resume)
+            self._transformer = checkpoint['transformer']
+
+        self._fit_encoded(self._transformer.encode(train_data), epochs, checkpoint)
+
+    @random_state
+    def partial_fit(self, train_data, epochs=1):
+        """
+        Keep training the fitted model on `train_data` for `epochs` epochs.
+
+        The fitted DataTransformer, networks, optimizers and GradScalers are
+        reused, so a model can be refreshed on new data without training from
+        scratch. `train_data` must have the columns the model was fitted on;
+        the DataSampler, and so the category frequencies used by `sample`, is
+        rebuilt from it. Categories missing from `train_data` keep their slot
+        in the conditional vector with zero frequency.
+        """
+        if getattr(self, '_discriminator', None) is None:
+            raise RuntimeError('`partial_fit` needs a model trained by `fit` or `fit_stream`.')
+
+        discrete_columns = [
+            cti.column_name for cti in self._transformer._column_transform_info_list
+            if cti.column_type == 'discrete'
+        ]
+        if not self._transformer.dataframe:
+            discrete_columns = [int(column) for column in discrete_columns]
+        self._validate_discrete_columns(train_data, discrete_columns)
+        self._validate_null_data(train_data, discrete_columns)
+
+        self._fit_encoded(self._transformer.encode(train_data), epochs, warm_start=True)
+
+    def _fit_encoded(self, train_data, epochs, checkpoint=None, warm_start=False):
+        """Train on in-memory `EncodedData`, holding out the evaluation rows first."""
+        output_info = self._transformer.output_info_list
+        holdout = None
+        category_counts = None
+        if warm_start or getattr(self, '_eval_interval', None):
+            # counted on all the rows, so a category whose rows all end up in the
+            # holdout, or that a warm start's data lacks, keeps its slot in the
+            # conditional vector the networks were built for
+            category_counts = count_categories(train_data, output_info)
+        self._holdout_index = None
+        if getattr(self, '_eval_interval', None):
+            held = checkpoint['holdout_index'] if checkpoint is not None else None
+            train_data, holdout = self._split_holdout(train_data, held)
+        self._data_sampler = DataSampler(train_data, output_info, self._log_frequency, category_counts)
+
+        sampler = self._window_sampler(train_data, self._data_sampler)
+        if checkpoint is not None and checkpoint['rng']['sampler'] is not None and isinstance(
+            sampler, DeviceDataSampler
+        ):
+            # the only window is reused every epoch, so its generator carries on where it stopped
+            sampler.generator.set_state(checkpoint['rng']['sampler'])
+
+        window = (train_data, sampler)
+        self._train(epochs, lambda: [window], holdout, checkpoint, warm_start)
+
+    def _split_holdout(self, encoded, held=None):
+        """
+        Split the rows `held` (by default `eval_rows` random rows, at most a
+        fifth) off the encoded data.
+
+        Returns:
+            tuple:
+                The training rows and the held-out rows, both `EncodedData`,
+                or the data unchanged and None when too few rows are left.
+        """
+        if held is None:
+            n_holdout = min(self._eval_rows, len(encoded) // 5)
+            if n_holdout == 0:
+                return encoded, None
+
+            held = np.sort(np.random.permutation(len(encoded))[:n_holdout])
+
+        self._holdout_index = held
+        kept = np.setdiff1d(np.arange(len(encoded)), held, assume_unique=True)
+        return (
+            EncodedData(encoded.output_info_list, encoded.continuous[kept], encoded.codes[kept]),
+            EncodedData(encoded.output_info_list, encoded.continuous[held], encoded.codes[held]),
+        )
+
+    @random_state
+    def fit_stream(
+        self,
+        source,
+        discrete_columns=(),
+        chunksize=100_000,
+        max_chunks_in_memory=4,
+        reservoir_size=100_000,
+        resume=None,
+    ):
+        """
+        Train the SynPro model on data streamed from disk in chunks.
+
+        The DataTransformer is fitted on a uniform reservoir sample of the data,
+        then every epoch transforms the stream lazily, one window of
+        `max_chunks_in_memory` chunks at a time, so peak memory depends on
+        `chunksize * max_chunks_in_memory` rather than on the dataset size.
+
+        Args:
+            source (str, os.PathLike, pandas.DataFrame, numpy.ndarray or callable):
+                A CSV or Parquet path, an in-memory table, or a zero-argument
+                callable returning a fresh iterable of DataFrame chunks.
+            discrete_columns (list-like):
+                Discrete column names (or indices for array chunks).
+            chunksize (int):
+                Rows per chunk for file and in-memory sources.
+            max_chunks_in_memory (int):
+                Number of transformed chunks held in memory at once.
+            reservoir_size (int):
+                Number of rows sampled to fit the DataTransformer.
+            resume (str or None):
+                Checkpoint of an interrupted `fit_stream` on the same source
+                to continue from, like `fit(..., resume=path)`.
+
+        With `eval_interval`, the fidelity evaluation compares against rows of
+        the reservoir sample, which are not excluded from training.
+        """
+        chunks = iter_data_chunks(source, chunksize)
+        sample = reservoir_sample(chunks(), reservoir_size)
+        self._validate_discrete_columns(sample, discrete_columns)
+
+        def validated_chunks():
+            for chunk in chunks():
+                self._validate_null_data(chunk, discrete_columns)
+                yield chunk
+
+        checkpoint = None
+        if resume is None:
+            self._transformer = self._make_transformer()
+            self._transformer.fit(sample, discrete_columns)
+        else:
+            checkpoint = self._read_checkpoint(resume)
+            self._transformer = checkpoint['transformer']
+        chunked_sampler = ChunkedDataSampler(
+            validated_chunks,
+            self._transformer,
+            self._log_frequency,
+            max_chunks_in_memory=max_chunks_in_memory,
+        )
+        self._data_sampler = chunked_sampler.data_sampler
+        holdout = None
+        if checkpoint is not None and checkpoint['holdout'] is not None:
+            holdout = checkpoint['holdout']
+        elif getattr(self, '_eval_interval', None):
+            _, holdout = self._split_holdout(self._transformer.encode(sample))
+        # the reservoir rows are not excluded from training
+        self._holdout_index = None
+
+        def iter_windows():
+            for train_data, data_sampler in chunked_sampler.iter_windows():
+                yield train_data, self._window_sampler(train_data, data_sampler)
+
+        self._train(self._epochs, iter_windows, holdout, checkpoint)
+
+    def _make_transformer(self):
+        return DataTransformer(
+            n_jobs=getattr(self, '_transformer_n_jobs', None),
+            max_fit_rows=getattr(self, '_transformer_max_fit_rows', None),
+            cache_dir=getattr(self, '_transformer_cache_dir', None),
+        )
+
+    def _window_sampler(self, train_data, data_sampler):
+        """Sampler used by the training loop for one window of training data."""
+        if self._data_on_device:
+            return DeviceDataSampler(data_sampler, train_data, self._device)
 
+        return data_sampler
+
+    def _sample_condvec(self, data_sampler):
+        """Training conditional vectors as `(cond, mask, col, opt)` with device tensors."""
+        profiler = getattr(self, '_profiler', None)
+        with profile_range(profiler, 'sample_condvec'):
+            condvec = data_sampler.sample_condvec(self._batch_size)
+        if condvec is None or isinstance(data_sampler, DeviceDataSampler):
+            return condvec
+
+        cond, mask, col, opt = condvec
+        with profile_range(profiler, 'host_to_device'):
+            cond = torch.from_numpy(cond).to(self._device)
+            mask = torch.from_numpy(mask).to(self._device)
+        return cond, mask, col, opt
+
+    def _sample_real(self, data_sampler, train_data, col, opt):
+        """
+        Real batch on the device matching a shuffled copy of the conditions.
+
+        Returns the batch and the permutation applied to `col`/`opt` (None when
+        there are no conditions).
+        """
+        profiler = getattr(self, '_profiler', None)
+        if isinstance(data_sampler, DeviceDataSampler):
+            with profile_range(profiler, 'sample_data'):
+                if col is None:
+                    return data_sampler.sample_data(self._batch_size, None, None), None
+
+                perm = torch.randperm(
+                    self._batch_size, device=self._device, generator=data_sampler.generator
+                )
+                return data_sampler.sample_data(self._batch_size, col[perm], opt[perm]), perm
+
+        with profile_range(profiler, 'sample_data'):
+            perm = None
+            if col is None:
+                idx = data_sampler.sample_idx(self._batch_size, None, None)
+            else:
+                perm = np.arange(self._batch_size)
+                np.random.shuffle(perm)
+                idx = data_sampler.sample_idx(self._batch_size, col[perm], opt[perm])
+
+        with profile_range(profiler, 'host_to_device'):
+            return train_data.take_tensor(idx, self._device), perm
+
+    def _sample_batch(self, train_data, data_sampler, mean, std, with_real=True):
+        """
+        Inputs of one discriminator (`with_real=True`) or generator update.
+
+        Returns `(fakez, c1, m1, real, c2)`: the generator input, the
+        condition vectors and masks (None without discrete columns), and the
+        real batch with its own shuffled copy of the conditions (None for
+        generator updates).
+        """
+        fakez = torch.normal(mean=mean, std=std)
+        condvec = self._sample_condvec(data_sampler)
+        if condvec is None:
+            real = self._sample_real(data_sampler, train_data, None, None)[0] if with_real else None
+            return fakez, None, None, real, None
+
+        c1, m1, col, opt = condvec
+        fakez = torch.cat([fakez, c1], dim=1)
+        if not with_real:
+            return fakez, c1, m1, None, None
+
+        real, perm = self._sample_real(data_sampler, train_data, col, opt)
+        return fakez, c1, m1, real, c1[perm]
+
+    def _amp_dtype(self):
+        """Autocast dtype on the model's device, or None without mixed precision."""
+        mode = getattr(self, '_mixed_precision', False)
+        if not mode:
+            return None
+        if mode is True:
+            mode = 'fp16' if self._device.type == 'cuda' else 'bf16'
+        return torch.float16 if mode == 'fp16' else torch.bfloat16
+
+    def _autocast(self):
+        dtype = self._amp_dtype()
+        return torch.autocast(self._device.type, dtype=dtype, enabled=dtype is not None)
+
+    def _build_networks(self):
+        """Fresh generator, discriminator, Adam optimizers and GradScalers for a new fit."""
         data_dim = self._transformer.output_dimensions
         gen_input_dim = self._embedding_dim + self._data_sampler.dim_cond_vec()
 
@@ -337,251 +988,652 @@ class SynPro(BaseSynthesizer):
             enable_spectral_norm=False  # Typically spectral norm is more crucial in D
         ).to(self._device)
 
-        discriminator = Discriminator(
+        self._discriminator = Discriminator(
             data_dim + self._data_sampler.dim_cond_vec(),
             self._discriminator_dim,
             pac=self._pac,
             enable_spectral_norm=self._enable_spectral_norm
         ).to(self._device)
 
-        optimizerG = optim.Adam(
+        self._optimizer_g = optim.Adam(
             self._generator.parameters(),
             lr=self._generator_lr,
             betas=(0.5, 0.9),
             weight_decay=self._generator_decay
         )
-        optimizerD = optim.Adam(
-            discriminator.parameters(),
+        self._optimizer_d = optim.Adam(
+            self._discriminator.parameters(),
             lr=self._discriminator_lr,
             betas=(0.5, 0.9),
             weight_decay=self._discriminator_decay
         )
 
-        mean = torch.zeros(self._batch_size, self._embedding_dim, device=self._device)
-        std = mean + 1
-        self.loss_values = pd.DataFrame(columns=['Epoch', 'Generator Loss', 'Discriminator Loss'])
+        # One scaler per optimizer, so inf/NaN gradients of one network do not
+        # skip or rescale the steps of the other. bf16 needs no loss scaling.
+        scaler_enabled = self._amp_dtype() == torch.float16
+        self._scaler_d = torch.amp.GradScaler(self._device.type, enabled=scaler_enabled)
+        self._scaler_g = torch.amp.GradScaler(self._device.type, enabled=scaler_enabled)
 
-        steps_per_epoch = max(len(train_data) // self._batch_size, 1)
-        epoch_iterator = tqdm(range(epochs), disable=(not self._verbose))
+    def _train(self, epochs, iter_windows, holdout=None, checkpoint=None, warm_start=False):
+        """
+        Build the networks and run the adversarial training loop.
+
+        `iter_windows` returns, for each epoch, an iterable of
+        `(train_data, data_sampler)` pairs that together cover the training set.
+        With `eval_interval` set, the generator is scored against the
+        `holdout` rows (`EncodedData`) every `eval_interval` epochs and after
+        the last one; training stops after `patience` evaluations without
+        improvement. At the end, the training state of the best generator
+        (networks, optimizers and loss scalers) is restored, so `partial_fit`
+        or a resumed run carries on from a consistent state.
+
+        `checkpoint` (a dict read by `_read_checkpoint`) continues an
+        interrupted run from its last saved epoch; `warm_start` keeps
+        training the current networks and optimizers instead of new ones.
+        """
+        adv_loss = make_adv_loss(self._adv_loss, self._gp_lambda, self._r1_gamma)
+        evaluator = early_stopping = None
+        eval_interval = getattr(self, '_eval_interval', None)
+        if eval_interval and holdout is not None:
+            evaluator = FidelityEvaluator(holdout)
+            early_stopping = EarlyStopping(self._patience, self._min_delta)
+        self.best_epoch = None
+        self.close_sample_workers()
+        self._inference_generator = None
+        self._output_layout = OutputLayout(self._transformer.output_info_list)
+        if not warm_start:
+            self._build_networks()
+
+        telemetry = self.telemetry = TrainingTelemetry(
+            self._device,
+            make_sinks(getattr(self, '_telemetry_sinks', None)),
+            metrics=_EVALUATION_METRICS if evaluator is not None else (),
+        )
+        train_step = _TrainStep(
+            self, self._discriminator, self._optimizer_d, self._optimizer_g,
+            self._scaler_d, self._scaler_g, adv_loss,
+            reg_interval=getattr(self, '_reg_interval', 1),
+            compile=getattr(self, '_compile_train_step', False),
+        )
+        start_epoch = 0
+        if checkpoint is not None:
+            # after the networks are built, since building them draws random numbers
+            start_epoch = self._load_checkpoint(checkpoint, train_step, telemetry, early_stopping)
+
+        checkpoint_path = getattr(self, '_checkpoint_path', None)
+        checkpoint_interval = getattr(self, '_checkpoint_interval', 10)
+        sampler_generator = None
+        epoch_iterator = tqdm(range(start_epoch, epochs), disable=(not self._verbose))
         if self._verbose:
             desc = "Gen. ({gen:.2f}) | Discrim. ({dis:.2f})"
             epoch_iterator.set_description(desc.format(gen=0, dis=0))
 
         for epoch in epoch_iterator:
-            for _ in range(steps_per_epoch):
-                # ==========================
-                # Train Discriminator
-                # ==========================
-                for _dstep in range(self._discriminator_steps):
-                    # Sample noise
-                    fakez = torch.normal(mean=mean, std=std)
-                    condvec = self._data_sampler.sample_condvec(self._batch_size)
-                    if condvec is None:
-                        c1, m1, col, opt = None, None, None, None
-                        real = self._data_sampler.sample_data(train_data, self._batch_size, col, opt)
-                    else:
-                        c1, m1, col, opt = condvec
-                        c1 = torch.from_numpy(c1).to(self._device)
-                        m1 = torch.from_numpy(m1).to(self._device)
-                        fakez = torch.cat([fakez, c1], dim=1)
-
-                        perm = np.arange(self._batch_size)
-                        np.random.shuffle(perm)
-                        real = self._data_sampler.sample_data(train_data, self._batch_size, col[perm], opt[perm])
-                        c2 = c1[perm]
-
-                    real = torch.from_numpy(real.astype('float32')).to(self._device)
-
-                    # Forward pass in mixed precision if enabled
-                    if self._scaler:
-                        with autocast():
-                            fake = self._generator(fakez)
-                            fakeact = self._apply_activate(fake)
-
-                            if c1 is not None:
-                                fake_cat = torch.cat([fakeact, c1], dim=1)
-                                real_cat = torch.cat([real, c2], dim=1)
-                            else:
-                                fake_cat = fakeact
-                                real_cat = real
-
-                            d_fake = discriminator(fake_cat)
-                            d_real = discriminator(real_cat)
-
-                            if self._adv_loss == 'wgan-gp':
-                                gp = discriminator.calc_gradient_penalty_wgan_gp(
-                                    real_cat, fake_cat, device=self._device, lambda_=self._gp_lambda
-                                )
-                                loss_d = -(torch.mean(d_real) - torch.mean(d_fake)) + gp
-
-                            elif self._adv_loss == 'r1':
-                                # R1 penalty uses gradient wrt real data
-                                r1_penalty = discriminator.calc_gradient_penalty_r1(real_cat, d_real)
-                                loss_d = -(torch.mean(d_real) - torch.mean(d_fake)) + 0.5 * self._r1_gamma * r1_penalty
-
-                            elif self._adv_loss == 'hinge':
-                                # Hinge-based loss
-                                loss_d_real = torch.mean(F.relu(1.0 - d_real))
-                                loss_d_fake = torch.mean(F.relu(1.0 + d_fake))
-                                loss_d = loss_d_real + loss_d_fake
-
-                            else:
-                                raise ValueError(f"Unsupported adv_loss: {self._adv_loss}")
-
-                        optimizerD.zero_grad()
-                        # scale and backward
-                        self._scaler.scale(loss_d).backward(retain_graph=True)
-                        self._scaler.step(optimizerD)
-                        self._scaler.update()
-
-                    else:
-                        # Normal precision
-                        fake = self._generator(fakez)
-                        fakeact = self._apply_activate(fake)
-
-                        if c1 is not None:
-                            fake_cat = torch.cat([fakeact, c1], dim=1)
-                            real_cat = torch.cat([real, c2], dim=1)
-                        else:
-                            fake_cat = fakeact
-                            real_cat = real
-
-                        d_fake = discriminator(fake_cat)
-                        d_real = discriminator(real_cat)
-
-                        if self._adv_loss == 'wgan-gp':
-                            gp = discriminator.calc_gradient_penalty_wgan_gp(
-                                real_cat, fake_cat, device=self._device, lambda_=self._gp_lambda
-                            )
-                            loss_d = -(torch.mean(d_real) - torch.mean(d_fake)) + gp
-
-                        elif self._adv_loss == 'r1':
-                            r1_penalty = discriminator.calc_gradient_penalty_r1(real_cat, d_real)
-                            loss_d = -(torch.mean(d_real) - torch.mean(d_fake)) + 0.5 * self._r1_gamma * r1_penalty
-
-                        elif self._adv_loss == 'hinge':
-                            loss_d_real = torch.mean(F.relu(1.0 - d_real))
-                            loss_d_fake = torch.mean(F.relu(1.0 + d_fake))
-                            loss_d = loss_d_real + loss_d_fake
-
-                        else:
-                            raise ValueError(f"Unsupported adv_loss: {self._adv_loss}")
-
-                        optimizerD.zero_grad()
-                        loss_d.backward(retain_graph=True)
-                        optimizerD.step()
-
-                # ==========================
-                # Train Generator
-                # ==========================
-                fakez = torch.normal(mean=mean, std=std)
-                condvec = self._data_sampler.sample_condvec(self._batch_size)
-                if condvec is None:
-                    c1, m1, col, opt = None, None, None, None
-                else:
-                    c1, m1, col, opt = condvec
-                    c1 = torch.from_numpy(c1).to(self._device)
-                    m1 = torch.from_numpy(m1).to(self._device)
-                    fakez = torch.cat([fakez, c1], dim=1)
-
-                if self._scaler:
-                    with autocast():
-                        fake = self._generator(fakez)
-                        fakeact = self._apply_activate(fake)
-                        if c1 is not None:
-                            y_fake = discriminator(torch.cat([fakeact, c1], dim=1))
-                        else:
-                            y_fake = discriminator(fakeact)
-
-                        cross_entropy = 0
-                        if condvec is not None:
-                            cross_entropy = self._cond_loss(fake, c1, m1)
-
-                        if self._adv_loss in ['wgan-gp', 'r1']:
-                            loss_g = -torch.mean(y_fake) + cross_entropy
-                        elif self._adv_loss == 'hinge':
-                            # Hinge generator tries to push d_fake >= -1
-                            loss_g = -torch.mean(y_fake) + cross_entropy
-                        else:
-                            raise ValueError(f"Unsupported adv_loss: {self._adv_loss}")
-
-                    optimizerG.zero_grad()
-                    self._scaler.scale(loss_g).backward()
-                    self._scaler.step(optimizerG)
-                    self._scaler.update()
+            telemetry.start_epoch(epoch)
+            for train_data, data_sampler in iter_windows():
+                steps = max(len(train_data) // self._batch_size, 1)
+                for _ in range(steps):
+                    loss_g, loss_d = train_step(train_data, data_sampler)
+                    telemetry.record_step(loss_g, loss_d, self._batch_size)
+
+                sampler_generator = getattr(data_sampler, 'generator', None)
+                # drop the window before the next one is loaded
+                del train_data, data_sampler
+
+            metrics = None
+            stop = False
+            if evaluator is not None and ((epoch + 1) % eval_interval == 0 or epoch == epochs - 1):
+                start = time.perf_counter()
+                metrics = evaluator.evaluate(self._evaluation_sample(len(holdout)))
+                metrics['evaluation_seconds'] = time.perf_counter() - start
+                stop = early_stopping.update(metrics['fidelity_score'], epoch, self._training_state())
+
+            telemetry.end_epoch(metrics)
+            if self._verbose and telemetry.last_record is not None:
+                # latest epoch whose losses reached the host; no sync is forced
+                record = telemetry.last_record
+                epoch_iterator.set_description(
+                    desc.format(gen=record['generator_loss'], dis=record['discriminator_loss'])
+                )
+            if checkpoint_path is not None and (
+                (epoch + 1) % checkpoint_interval == 0 or epoch == epochs - 1 or stop
+            ):
+                self._save_checkpoint(
+                    checkpoint_path, epoch + 1, train_step, telemetry, early_stopping, holdout,
+                    sampler_generator
+                )
+            if stop:
+                break
+
+        telemetry.close()
+        if early_stopping is not None:
+            early_stopping.restore(self._training_state())
+            self.best_epoch = early_stopping.best_epoch
+
+    def _training_state(self):
+        """Networks, optimizers and loss scalers, by checkpoint key."""
+        return {
+            'generator': self._generator,
+            'discriminator': self._discriminator,
+            'optimizer_g': self._optimizer_g,
+            'optimizer_d': self._optimizer_d,
+            'scaler_g': self._scaler_g,
+            'scaler_d': self._scaler_d,
+        }
+
+    def _save_checkpoint(self, path, epoch, train_step, telemetry, early_stopping, holdout,
+                         sampler_generator):
+        """
+        Write the full training state after `epoch` epochs to `path`.
 
-                else:
-                    # normal precision
-                    fake = self._generator(fakez)
-                    fakeact = self._apply_activate(fake)
-                    if c1 is not None:
-                        y_fake = discriminator(torch.cat([fakeact, c1], dim=1))
-                    else:
-                        y_fake = discriminator(fakeact)
-
-                    cross_entropy = 0
-                    if condvec is not None:
-                        cross_entropy = self._cond_loss(fake, c1, m1)
-
-                    if self._adv_loss in ['wgan-gp', 'r1']:
-                        loss_g = -torch.mean(y_fake) + cross_entropy
-                    elif self._adv_loss == 'hinge':
-                        loss_g = -torch.mean(y_fake) + cross_entropy
-                    else:
-                        raise ValueError(f"Unsupported adv_loss: {self._adv_loss}")
-
-                    optimizerG.zero_grad()
-                    loss_g.backward()
-                    optimizerG.step()
-
-            g_loss_val = loss_g.detach().cpu().item()
-            d_loss_val = loss_d.detach().cpu().item()
-            row = pd.DataFrame({
-                "Epoch": [epoch],
-                "Generator Loss": [g_loss_val],
-                "Discriminator Loss": [d_loss_val],
-            })
-            self.loss_values = pd.concat([self.loss_values, row], ignore_index=True)
-
-            if self._verbose:
-                epoch_iterator.set_description(desc.format(gen=g_loss_val, dis=d_loss_val))
+        The file is written next to `path` and then renamed over it, so a run
+        killed while saving leaves the previous checkpoint intact.
+        """
+        state = {name: obj.state_dict() for name, obj in self._training_state().items()}
+        state.update({
+            'epoch': epoch,
+            'transformer': self._transformer,
+            'discriminator_step': train_step._d_step,
+            'telemetry': telemetry.state_dict(),
+            'early_stopping': early_stopping.state_dict() if early_stopping is not None else None,
+            'holdout': holdout,
+            'holdout_index': getattr(self, '_holdout_index', None),
+            'rng': {
+                'numpy': np.random.get_state(),
+                'torch': torch.get_rng_state(),
+                'cuda': torch.cuda.get_rng_state_all() if self._device.type == 'cuda' else None,
+                'sampler': sampler_generator.get_state() if sampler_generator is not None else None,
+            },
+        })
+        temporary_path = f'{os.fspath(path)}.tmp'
+        torch.save(state, temporary_path)
+        os.replace(temporary_path, path)
 
-    @random_state
-    def sample(self, n, condition_column=None, condition_value=None):
-        """Sample data from the trained SynPro model."""
+    @staticmethod
+    def _read_checkpoint(path):
+        return torch.load(path, map_location='cpu', weights_only=False)
+
+    def _load_checkpoint(self, checkpoint, train_step, telemetry, early_stopping):
+        """Restore the networks, optimizers, scalers and random states; returns the epoch to resume at."""
+        for name, obj in self._training_state().items():
+            obj.load_state_dict(checkpoint[name])
+        train_step._d_step = checkpoint['discriminator_step']
+        telemetry.load_state_dict(checkpoint['telemetry'])
+        if early_stopping is not None and checkpoint['early_stopping'] is not None:
+            early_stopping.load_state_dict(checkpoint['early_stopping'])
+
+        rng = checkpoint['rng']
+        np.random.set_state(rng['numpy'])
+        torch.set_rng_state(rng['torch'])
+        if rng['cuda'] is not None and self._device.type == 'cuda':
+            torch.cuda.set_rng_state_all(rng['cuda'])
+        return checkpoint['epoch']
+
+    def _evaluation_sample(self, n):
+        """
+        Activated output of the current generator for `n` rows, in eval mode.
+
+        Noise and conditions come from fixed seeds, so every evaluation scores
+        the generator on the same inputs, and the global random states (thus
+        the training run) are left untouched.
+        """
+        generator = torch.Generator(device=self._device)
+        generator.manual_seed(0)
+        condvec = self._data_sampler.sample_original_condvec(n, random_state=np.random.RandomState(0))
+        # the Linear layers of the copy draw their (overwritten) initial weights
+        with torch.random.fork_rng(devices=[]):
+            inference_generator = InferenceGenerator(self._generator)
+
+        with torch.inference_mode(), self._autocast():
+            fakez = torch.randn(n, self._embedding_dim, device=self._device, generator=generator)
+            if condvec is not None:
+                fakez = torch.cat([fakez, torch.from_numpy(condvec).to(self._device)], dim=1)
+            fakeact = self._apply_activate(inference_generator(fakez), generator=generator)
+        return fakeact.cpu().numpy()
+
+    def _condition_vector(self, condition_column, condition_value, batch_size):
         if condition_column is not None and condition_value is not None:
             col_info = self._transformer.convert_column_name_value_to_id(condition_column, condition_value)
-            global_cond_vec = self._data_sampler.generate_cond_from_condition_column_info(col_info, self._batch_size)
-        else:
-            global_cond_vec = None
+            return self._data_sampler.generate_cond_from_condition_column_info(col_info, batch_size)
+
+        return None
+
+    def _get_inference_generator(self):
+        """Frozen, BatchNorm-folded copy of the generator, built on first use."""
+        generator = getattr(self, '_inference_generator', None)
+        if generator is None:
+            with torch.inference_mode(False):
+                generator = InferenceGenerator(self._generator)
+            if getattr(self, '_compile_generator', False):
+                generator = torch.compile(generator)
+            self._inference_generator = generator
+        return generator
+
+    def _generate_batch(self, global_cond_vec, batch_size, rng=None, generator=None):
+        """
+        Generate one batch of activated generator output as a NumPy array.
 
-        steps = n // self._batch_size + 1
-        data = []
-        for _ in range(steps):
-            mean = torch.zeros(self._batch_size, self._embedding_dim, device=self._device)
+        `rng` (numpy RandomState) and `generator` (torch.Generator) replace the
+        global random states when given.
+        """
+        profiler = getattr(self, '_profiler', None)
+        with torch.inference_mode(), self._autocast():
+            mean = torch.zeros(batch_size, self._embedding_dim, device=self._device)
             std = mean + 1
-            fakez = torch.normal(mean=mean, std=std)
+            fakez = torch.normal(mean=mean, std=std, generator=generator)
 
             if global_cond_vec is not None:
-                c1 = torch.from_numpy(global_cond_vec).to(self._device)
-                fakez = torch.cat([fakez, c1], dim=1)
+                condvec = global_cond_vec
             else:
-                condvec = self._data_sampler.sample_original_condvec(self._batch_size)
-                if condvec is not None:
+                with profile_range(profiler, 'sample_condvec'):
+                    condvec = self._data_sampler.sample_original_condvec(batch_size, random_state=rng)
+
+            if condvec is not None:
+                with profile_range(profiler, 'host_to_device'):
                     c1 = torch.from_numpy(condvec).to(self._device)
-                    fakez = torch.cat([fakez, c1], dim=1)
+                fakez = torch.cat([fakez, c1], dim=1)
+
+            with profile_range(profiler, 'generator'):
+                fake = self._get_inference_generator()(fakez)
+            fakeact = self._apply_activate(fake, generator=generator)
+
+        with profile_range(profiler, 'device_to_host'):
+            return fakeact.cpu().numpy()
 
-            # Inference can also do autocast if desired, but typically optional
-            fake = self._generator(fakez)
-            fakeact = self._apply_activate(fake)
-            data.append(fakeact.detach().cpu().numpy())
+    @random_state
+    def _spawn_random_generators(self):
+        """Private NumPy and torch generators seeded from the model's random state."""
+        rng = np.random.RandomState(np.random.randint(0, 2**31 - 1))
+        generator = torch.Generator(device=self._device)
+        generator.manual_seed(int(torch.randint(0, 2**62, (1,)).item()))
+        return rng, generator
+
+    def _sample_encoded(self, n, global_cond_vec, batch_size, rng, generator, cond=None):
+        """
+        Generate `n` rows in the transformed space.
 
+        `cond`, when given, holds one conditional vector per row and replaces
+        `global_cond_vec`.
+        """
+        if cond is not None:
+            data = [
+                self._generate_batch(batch_cond, len(batch_cond), rng, generator)
+                for batch_cond in np.split(cond, range(batch_size, n, batch_size))
+            ]
+        else:
+            data = [
+                self._generate_batch(global_cond_vec, batch_size, rng, generator)
+                for _ in range(-(-n // batch_size))
+            ]
+
+        if not data:
+            return np.zeros((0, self._transformer.output_dimensions), dtype='float32')
+        return np.concatenate(data, axis=0)[:n]
+
+    def _condition_category_ids(self, n, conditions):
+        """
+        Resolve `conditions` to an `(n, n_columns)` array of conditional vector
+        positions, -1 where a row is not conditioned on a column.
+        """
+        if isinstance(conditions, list):
+            conditions = pd.DataFrame(conditions)
+        if isinstance(conditions, pd.DataFrame):
+            conditions = {column: conditions[column] for column in conditions.columns}
+        if not isinstance(conditions, dict):
+            raise TypeError('`conditions` must be a dict, a DataFrame or a list of dicts.')
+
+        category_ids = np.full((n, len(conditions)), -1, dtype=np.int64)
+        for column_id, (column, spec) in enumerate(conditions.items()):
+            if isinstance(spec, dict):
+                # distribution of values, e.g. {'A': 0.3, 'B': 0.7}
+                offsets = self._transformer.convert_column_name_values_to_ids(column, list(spec))['cond_offset']
+                weights = np.asarray(list(spec.values()), dtype=float)
+                draws = np.random.choice(len(offsets), n, p=weights / weights.sum())
+                category_ids[:, column_id] = offsets[draws]
+            elif isinstance(spec, (list, tuple, np.ndarray, pd.Series)):
+                # one value per row, missing values leave the row unconditioned
+                if len(spec) != n:
+                    raise ValueError(
+                        f'Got {len(spec)} conditions for column `{column}` but `n` is {n}.'
+                    )
+                values = pd.Series(spec, dtype=object).to_numpy()
+                present = ~pd.isna(values)
+                category_ids[present, column_id] = self._transformer.convert_column_name_values_to_ids(
+                    column, values[present]
+                )['cond_offset']
+            else:
+                category_ids[:, column_id] = self._transformer.convert_column_name_value_to_id(
+                    column, spec
+                )['cond_offset']
+
+        return category_ids
+
+    @random_state
+    def sample(
+        self,
+        n,
+        condition_column=None,
+        condition_value=None,
+        n_jobs=None,
+        batch_size=None,
+        conditions=None,
+    ):
+        """
+        Sample data from the trained SynPro model.
+
+        `conditions` conditions the rows on discrete column values, in one of
+        these forms:
+
+        - `{'column': 'A'}`: every row conditioned on `column == 'A'`.
+        - `{'column': {'A': 0.3, 'B': 0.7}}`: each row conditioned on a value
+          drawn from the given weights.
+        - `{'column': [...]}`, a DataFrame or a list of dicts: one value per
+          row (`n` of them); missing values leave a row unconditioned.
+
+        Several columns may be given; every listed value is set in the row's
+        conditional vector. Rows without any condition are drawn as in
+        unconditional sampling. All vectors are built at once and the rows
+        are generated in `batch_size` batches.
+
+        Rows come from a frozen eval-mode copy of the generator with BatchNorm
+        folded into the Linear layers, run without autograd. `batch_size`
+        (default: the training batch size) sets how many rows are generated
+        per forward pass.
+
+        With `n_jobs` set, the rows are generated in fixed-size shards, each
+        with its own seed drawn from the model's random state, on a pool of
+        `n_jobs` processes sharing the generator weights (-1 uses all cores).
+        The output then depends on the random state but not on `n_jobs`.
+        """
+        batch_size = batch_size or self._batch_size
+        profiler = getattr(self, '_profiler', None)
+        if conditions is not None:
+            if condition_column is not None or condition_value is not None:
+                raise ValueError(
+                    'Pass either `conditions` or `condition_column`/`condition_value`, not both.'
+                )
+
+            with profile_range(profiler, 'condition_vectors'):
+                category_ids = self._condition_category_ids(n, conditions)
+                cond = self._data_sampler.generate_cond_from_category_ids(category_ids)
+            if n_jobs is not None:
+                return self._sample_sharded(n, None, n_jobs, batch_size, cond)
+
+            data = self._sample_encoded(n, None, batch_size, None, None, cond)
+            with profile_range(profiler, 'inverse_transform'):
+                return self._transformer.inverse_transform(data)
+
+        global_cond_vec = self._condition_vector(condition_column, condition_value, batch_size)
+        if n_jobs is not None:
+            return self._sample_sharded(n, global_cond_vec, n_jobs, batch_size)
+
+        steps = n // batch_size + 1
+        data = [self._generate_batch(global_cond_vec, batch_size) for _ in range(steps)]
         data = np.concatenate(data, axis=0)
         data = data[:n]
-        return self._transformer.inverse_transform(data)
+        with profile_range(profiler, 'inverse_transform'):
+            return self._transformer.inverse_transform(data)
+
+    def _sample_shard(self, n_rows, seed, global_cond_vec, batch_size, cond=None):
+        rng = np.random.RandomState(seed[0])
+        generator = torch.Generator(device=self._device)
+        generator.manual_seed(int(seed[1]))
+        encoded = self._sample_encoded(n_rows, global_cond_vec, batch_size, rng, generator, cond)
+        return self._transformer.inverse_transform(encoded)
+
+    def _sample_sharded(self, n, global_cond_vec, n_jobs, batch_size, cond=None):
+        if n_jobs == 0:
+            raise ValueError('`n_jobs` must be a positive number of workers or negative, not 0.')
+
+        shard_size = batch_size * max(_SAMPLE_SHARD_ROWS // batch_size, 1)
+        shard_rows = [min(shard_size, n - start) for start in range(0, n, shard_size)]
+        seeds = np.random.randint(0, 2**31 - 1, size=(len(shard_rows), 2))
+        shard_conds = [
+            None if cond is None else cond[start:start + rows]
+            for start, rows in zip(range(0, n, shard_size), shard_rows)
+        ]
+
+        n_cpus = os.cpu_count() or 1
+        n_workers = min(n_jobs if n_jobs > 0 else max(n_cpus + 1 + n_jobs, 1), len(shard_rows))
+        if n_workers <= 1:
+            shards = [
+                self._sample_shard(rows, seed, global_cond_vec, batch_size, shard_cond)
+                for rows, seed, shard_cond in zip(shard_rows, seeds, shard_conds)
+            ]
+        else:
+            pool = self._get_sample_pool(n_workers)
+            n_shards = len(shard_rows)
+            shards = list(pool.map(
+                _sample_shard_task,
+                shard_rows,
+                seeds,
+                [global_cond_vec] * n_shards,
+                [batch_size] * n_shards,
+                shard_conds,
+            ))
+
+        if not shards:
+            empty = np.zeros((0, self._transformer.output_dimensions), dtype='float32')
+            return self._transformer.inverse_transform(empty)
+        if isinstance(shards[0], pd.DataFrame):
+            return pd.concat(shards, ignore_index=True)
+        return np.concatenate(shards, axis=0)
+
+    def _get_sample_pool(self, n_workers):
+        pool = getattr(self, '_sample_pool', None)
+        if pool is not None and pool[1] != n_workers:
+            self.close_sample_workers()
+            pool = None
+
+        if pool is None:
+            # CPU copy of what sampling needs; pickling it through the spawn
+            # context moves the weights to shared memory instead of copying them.
+            state = {
+                '_inference_generator': InferenceGenerator(self._generator).cpu(),
+                '_transformer': self._transformer,
+                '_data_sampler': self._data_sampler,
+                '_output_layout': self._get_output_layout(),
+                '_batch_size': self._batch_size,
+                '_embedding_dim': self._embedding_dim,
+                '_device': torch.device('cpu'),
+                'random_states': None,
+            }
+            executor = ProcessPoolExecutor(
+                max_workers=n_workers,
+                mp_context=torch.multiprocessing.get_context('spawn'),
+                initializer=_init_sample_worker,
+                initargs=(state, max(torch.get_num_threads() // n_workers, 1)),
+            )
+            pool = self._sample_pool = (executor, n_workers)
+
+        return pool[0]
+
+    def close_sample_workers(self):
+        """Shut down the persistent sampling worker pool, if it is running."""
+        pool = getattr(self, '_sample_pool', None)
+        if pool is not None:
+            pool[0].shutdown(wait=True)
+        self._sample_pool = None
+
+    def iter_sample(
+        self,
+        n,
+        chunk_size=100_000,
+        condition_column=None,
+        condition_value=None,
+        batch_size=None,
+    ):
+        """
+        Sample data from the trained SynPro model in chunks.
+
+        Yields DataFrames (or arrays) of at most `chunk_size` rows, `n` rows in
+        total. While a chunk is being inverse-transformed on a background
+        thread, the generator is already producing the next one, so at most
+        three chunks are in memory at any time.
+
+        Generation draws from private NumPy/torch generators seeded once from
+        the model's random state, because the RDT reverse transforms on the
+        decoding thread swap the global NumPy state. A seeded model therefore
+        yields the same chunks on every run for the same `chunk_size`.
+
+        Args:
+            n (int):
+                Total number of rows to sample.
+            chunk_size (int):
+                Number of rows per yielded chunk.
+            condition_column (str):
+                Name of a discrete column to condition on.
+            condition_value (str):
+                Category of `condition_column` to condition on.
+            batch_size (int or None):
+                Rows per generator forward pass. Defaults to the training batch size.
+        """
+        if chunk_size < 1:
+            raise ValueError('`chunk_size` must be a positive integer.')
+
+        batch_size = batch_size or self._batch_size
+        global_cond_vec = self._condition_vector(condition_column, condition_value, batch_size)
+        rng, generator = self._spawn_random_generators()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = None
+            for start in range(0, n, chunk_size):
+                encoded = self._sample_encoded(
+                    min(chunk_size, n - start), global_cond_vec, batch_size, rng, generator
+                )
+                decoded = executor.submit(self._transformer.inverse_transform, encoded)
+                del encoded
+                if pending is not None:
+                    yield pending.result()
+
+                pending = decoded
+
+            if pending is not None:
+                yield pending.result()
+
+    def sample_to_file(
+        self,
+        n,
+        path,
+        chunk_size=100_000,
+        file_format=None,
+        condition_column=None,
+        condition_value=None,
+        batch_size=None,
+    ):
+        """
+        Sample `n` rows straight to a CSV, Parquet or Arrow IPC file.
+
+        Chunks from `iter_sample` are appended to the file as they are
+        decoded, so memory use is bounded by `chunk_size` instead of `n`.
+        Parquet and Arrow output require `pyarrow`.
+
+        Args:
+            n (int):
+                Total number of rows to sample.
+            path (str or os.PathLike):
+                Destination file.
+            chunk_size (int):
+                Number of rows generated, decoded and written at a time.
+            file_format (str or None):
+                `'csv'`, `'parquet'` or `'arrow'`. Inferred from the file
+                extension when None.
+            condition_column (str):
+                Name of a discrete column to condition on.
+            condition_value (str):
+                Category of `condition_column` to condition on.
+            batch_size (int or None):
+                Rows per generator forward pass. Defaults to the training batch size.
+        """
+        writer = open_chunk_writer(path, file_format)
+        try:
+            chunks = self.iter_sample(n, chunk_size, condition_column, condition_value, batch_size)
+            for chunk in chunks:
+                if not isinstance(chunk, pd.DataFrame):
+                    chunk = pd.DataFrame(chunk, columns=[str(num) for num in range(chunk.shape[1])])
+                writer.write(chunk)
+        finally:
+            writer.close()
+
+    def export_generator(self, path):
+        """
+        Export the inference generator with `torch.export` and save it to `path`.
+
+        The exported program maps a `(batch, embedding_dim + cond_dim)` input
+        (standard normal noise followed by the conditional vector) to the raw
+        generator output, before the tanh/softmax activations. The batch
+        dimension is dynamic. Load it with `torch.export.load(path).module()`.
+
+        Returns:
+            torch.export.ExportedProgram
+        """
+        generator = InferenceGenerator(self._generator)
+        example = torch.zeros(2, generator.in_features, device=self._device)
+        program = torch.export.export(
+            generator, (example,), dynamic_shapes=({0: torch.export.Dim('batch')},)
+        )
+        torch.export.save(program, path)
+        return program
+
+    @contextlib.contextmanager
+    def profile(self, trace_path=None, print_summary=True):
+        """
+        Profile the `fit` and `sample` calls made inside the `with` block.
+
+        Every stage of training and sampling (condition vectors, real batch
+        sampling, host/device copies, generator, activation, discriminator,
+        gradient penalty, conditional loss, backward, optimizer, inverse
+        transform) becomes a named `torch.profiler.record_function` range
+        with its own wall-clock timer. When the block ends, a summary table is
+        printed (and kept as `profiler.summary()`) and, with `trace_path`, a
+        Chrome trace of the whole block is written. Outside this block the
+        hooks are no-ops.
+
+        Rows sampled on worker processes (`n_jobs`) are not profiled.
+
+        Example:
+            with model.profile('trace.json') as profiler:
+                model.fit(data, discrete_columns)
+            profiler.summary()
+        """
+        profiler = Profiler(self._device, trace_path, print_summary)
+        self._profiler = profiler
+        try:
+            with profiler:
+                yield profiler
+        finally:
+            self._profiler = None
+
+    @property
+    def loss_values(self):
+        """Generator and discriminator loss at the end of every epoch, as a DataFrame."""
+        telemetry = getattr(self, 'telemetry', None)
+        if telemetry is None:
+            # models saved before the telemetry existed stored the DataFrame itself
+            return self.__dict__.get('loss_values')
+        return telemetry.loss_values()
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.pop('_sample_pool', None)
+        state['_profiler'] = None
+        return state
 
     def set_device(self, device):
         """Move the model to a specified device: CPU or GPU."""
         self._device = torch.device(device)
+        self._inference_generator = None
         if self._generator is not None:
             self._generator.to(self._device)
+
+        # training state kept for partial_fit (absent from models pickled before it)
+        if getattr(self, '_discriminator', None) is not None:
+            self._discriminator.to(self._device)
+            for optimizer in (self._optimizer_g, self._optimizer_d):
+                # the parameters were moved in place; loading casts the state to their device
+                optimizer.load_state_dict(optimizer.state_dict())
+        for name in ('_scaler_g', '_scaler_d'):
+            scaler = getattr(self, name, None)
+            if scaler is not None:
+                moved = torch.amp.GradScaler(self._device.type, enabled=scaler.is_enabled())
+                moved.load_state_dict(scaler.state_dict())
+                setattr(self, name, moved)
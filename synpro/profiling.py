@@ -0,0 +1,112 @@
+"""
+Opt-in profiling of the SynPro training and sampling hot paths.
+
+The training and sampling code wraps each stage (condition vectors, real
+batch sampling, host/device copies, generator, activation, discriminator,
+gradient penalty, backward, optimizer, inverse transform...) in
+`profile_range(profiler, name)`. Without an active `Profiler` this returns
+a shared no-op context manager, so the hooks cost one attribute lookup.
+
+With a `Profiler`, every range is a `torch.profiler.record_function` range
+and is timed with `perf_counter` (after a device synchronize on GPUs, so
+the time is the stage's own). When a trace path is given, a
+`torch.profiler.profile` session runs alongside and is exported as a
+Chrome trace (`chrome://tracing` or https://ui.perfetto.dev).
+"""
+
+import contextlib
+import time
+from collections import defaultdict
+
+import pandas as pd
+import torch
+from torch.profiler import ProfilerActivity, profile, record_function
+
+_NO_RANGE = contextlib.nullcontext()
+
+
+def profile_range(profiler, name):
+    """Context manager for the stage `name`: a no-op when `profiler` is None."""
+    if profiler is None:
+        return _NO_RANGE
+    return profiler.range(name)
+
+
+class Profiler:
+    """
+    Wall-clock timers and a torch profiler session for the stages of SynPro.
+
+    Args:
+        device (torch.device):
+            Device of the model; CUDA devices are synchronized at the end of
+            every range and added to the traced activities.
+        trace_path (str or None):
+            Where to write the Chrome trace. No torch profiler session runs
+            when None.
+        print_summary (bool):
+            Print the summary table when profiling ends.
+    """
+
+    def __init__(self, device, trace_path=None, print_summary=True):
+        self._cuda = torch.device(device).type == 'cuda'
+        self.trace_path = trace_path
+        self._print_summary = print_summary
+        self._calls = defaultdict(int)
+        self._seconds = defaultdict(float)
+        self._session = None
+        self._start = None
+        self.wall_seconds = None
+
+    @contextlib.contextmanager
+    def range(self, name):
+        with record_function(name):
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                if self._cuda:
+                    torch.cuda.synchronize()
+                self._seconds[name] += time.perf_counter() - start
+                self._calls[name] += 1
+
+    def __enter__(self):
+        if self.trace_path is not None:
+            activities = [ProfilerActivity.CPU]
+            if self._cuda:
+                activities.append(ProfilerActivity.CUDA)
+            self._session = profile(activities=activities)
+            self._session.__enter__()
+
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.wall_seconds = time.perf_counter() - self._start
+        if self._session is not None:
+            self._session.__exit__(*exc_info)
+            self._session.export_chrome_trace(self.trace_path)
+            self._session = None
+
+        if self._print_summary:
+            print(self.summary().to_string(index=False))
+
+    def summary(self):
+        """
+        Time spent in every stage, slowest first.
+
+        Nested stages are also counted in the stages around them.
+
+        Returns:
+            pandas.DataFrame:
+                Stage name, number of calls, total and mean time and share
+                of the profiled wall time.
+        """
+        names = sorted(self._seconds, key=self._seconds.get, reverse=True)
+        wall_seconds = self.wall_seconds or time.perf_counter() - self._start
+        return pd.DataFrame({
+            'Stage': names,
+            'Calls': [self._calls[name] for name in names],
+            'Total (s)': [self._seconds[name] for name in names],
+            'Mean (ms)': [1000 * self._seconds[name] / self._calls[name] for name in names],
+            '% of wall': [100 * self._seconds[name] / wall_seconds for name in names],
+        })
@@ -0,0 +1,357 @@
+"""
+Training telemetry for SynPro.
+
+`TrainingTelemetry` records what happens in the training loop without
+stalling it:
+
+- Step losses are copied into a preallocated ring buffer on the model's
+  device. The buffer is copied to the host asynchronously (pinned memory and
+  a CUDA event on GPUs) when it fills up and at the end of every epoch, so
+  no step waits for `.item()`.
+- Time spent in the `sampler`, `forward`, `backward` and `optimizer` phases
+  is accumulated per epoch, with CUDA events on GPUs and `perf_counter` on
+  the CPU, together with the epoch's wall time and rows/sec throughput.
+- Every finished epoch is handed as a flat dict to the configured sinks:
+  `CSVSink`, `JSONLSink` or `CallbackSink`.
+
+Epoch records (and `SynPro.loss_values`) are resolved lazily: on a GPU an
+epoch's record is usually published one epoch later, once its copies and
+events have completed.
+"""
+
+import contextlib
+import csv
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+
+PHASES = ('sampler', 'forward', 'backward', 'optimizer')
+
+
+class CSVSink:
+    """Append every epoch record as a row of a CSV file."""
+
+    def __init__(self, path):
+        self._file = open(path, 'w', newline='')
+        self._writer = None
+
+    def write(self, record):
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._file, fieldnames=list(record))
+            self._writer.writeheader()
+        self._writer.writerow(record)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class JSONLSink:
+    """Append every epoch record as one JSON object per line."""
+
+    def __init__(self, path):
+        self._file = open(path, 'w')
+
+    def write(self, record):
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class CallbackSink:
+    """Call `callback(record)` for every epoch record."""
+
+    def __init__(self, callback):
+        self._callback = callback
+
+    def write(self, record):
+        self._callback(record)
+
+    def close(self):
+        pass
+
+
+def make_sinks(spec):
+    """
+    Build the telemetry sinks described by `spec`.
+
+    Args:
+        spec (None, str, os.PathLike, callable, sink or list of them):
+            `.csv` and `.jsonl` paths give file sinks, callables a
+            `CallbackSink`; objects with `write`/`close` are used as they are.
+
+    Returns:
+        list:
+            The sinks.
+    """
+    if spec is None:
+        return []
+    if isinstance(spec, (list, tuple)):
+        return [sink for item in spec for sink in make_sinks(item)]
+
+    if isinstance(spec, (str, os.PathLike)):
+        path = os.fspath(spec)
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.csv':
+            return [CSVSink(path)]
+        if extension in ('.jsonl', '.json'):
+            return [JSONLSink(path)]
+        raise ValueError(f"Cannot infer the telemetry sink from `{extension}`; use .csv or .jsonl.")
+
+    if hasattr(spec, 'write') and hasattr(spec, 'close'):
+        return [spec]
+    if callable(spec):
+        return [CallbackSink(spec)]
+
+    raise TypeError("A telemetry sink must be a .csv/.jsonl path, a callable or a sink object.")
+
+
+class _PhaseTimer:
+    """Per-phase time of one epoch, from CUDA events on GPUs and `perf_counter` on the CPU."""
+
+    def __init__(self, device):
+        self._cuda = device.type == 'cuda'
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self._events = []
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        if self._cuda:
+            start = torch.cuda.Event(enable_timing=True)
+            end = torch.cuda.Event(enable_timing=True)
+            start.record()
+            yield
+            end.record()
+            self._events.append((name, start, end))
+        else:
+            start = time.perf_counter()
+            yield
+            self.seconds[name] += time.perf_counter() - start
+
+    def ready(self):
+        return not self._events or self._events[-1][2].query()
+
+    def resolve(self):
+        """Per-phase seconds; waits for the phase events of a GPU epoch."""
+        for name, start, end in self._events:
+            end.synchronize()
+            self.seconds[name] += start.elapsed_time(end) / 1000
+        self._events = []
+        return self.seconds
+
+
+class _PendingCopy:
+    """Losses of some steps on their way from the device buffer to the host."""
+
+    def __init__(self, losses, epochs, steps):
+        cuda = losses.is_cuda
+        self.host = torch.empty(losses.shape, dtype=losses.dtype, pin_memory=cuda)
+        self.host.copy_(losses, non_blocking=cuda)
+        self.event = None
+        if cuda:
+            self.event = torch.cuda.Event()
+            self.event.record()
+        self.epochs = epochs
+        self.steps = steps
+
+    def ready(self):
+        return self.event is None or self.event.query()
+
+    def result(self):
+        if self.event is not None:
+            self.event.synchronize()
+        return self.host.numpy()
+
+
+class TrainingTelemetry:
+    """
+    Losses, phase timings and throughput of a training run.
+
+    Args:
+        device (torch.device):
+            Device the losses live on.
+        sinks (list):
+            Objects with `write(record)` / `close()` receiving every epoch record.
+        capacity (int):
+            Number of steps held in the device loss buffer between two copies.
+        metrics (tuple):
+            Names of extra per-epoch values passed to `end_epoch`; every
+            record has them, NaN for epochs without a value.
+    """
+
+    def __init__(self, device, sinks=(), capacity=1024, metrics=()):
+        self._device = torch.device(device)
+        self._sinks = list(sinks)
+        self._capacity = capacity
+        self._metrics = tuple(metrics)
+        self._buffer = torch.zeros((capacity, 2), device=self._device)
+        self._position = 0
+        self._pending = []
+        self._open_epochs = []
+
+        self._epoch = None
+        self._step = 0
+        self._rows = 0
+        self._copies = 0
+        self._start = None
+        self._timer = None
+
+        self._loss_parts = []
+        self._epoch_records = []
+        self._step_losses = None
+
+    def phase(self, name):
+        """Context manager timing one of `PHASES` in the current epoch."""
+        if self._timer is None:
+            return contextlib.nullcontext()
+        return self._timer.phase(name)
+
+    def start_epoch(self, epoch):
+        self._epoch = epoch
+        self._step = 0
+        self._rows = 0
+        self._copies = 0
+        self._timer = _PhaseTimer(self._device)
+        self._start = time.perf_counter()
+
+    def record_step(self, loss_g, loss_d, n_rows):
+        """Store the step's losses in the device buffer, without a device sync."""
+        self._buffer[self._position, 0] = loss_g.detach()
+        self._buffer[self._position, 1] = loss_d.detach()
+        self._position += 1
+        self._step += 1
+        self._rows += n_rows
+        if self._position == self._capacity:
+            self._flush()
+
+    def _flush(self):
+        if self._position:
+            # the buffer is flushed at the end of every epoch, so it only
+            # holds steps of the current one
+            n = self._position
+            epochs = np.full(n, self._epoch)
+            steps = self._step - n + np.arange(n)
+            self._pending.append(_PendingCopy(self._buffer[:n], epochs, steps))
+            self._position = 0
+            self._copies += 1
+
+    def end_epoch(self, metrics=None):
+        """
+        Start the copy of the epoch's losses and publish every finished epoch.
+
+        `metrics` maps some of the telemetry's metric names to host values.
+        """
+        self._flush()
+        seconds = time.perf_counter() - self._start
+        self._open_epochs.append({
+            'epoch': self._epoch,
+            'steps': self._step,
+            'rows': self._rows,
+            'seconds': seconds,
+            'rows_per_sec': self._rows / seconds if seconds > 0 else float('nan'),
+            'timer': self._timer,
+            'copies': self._copies,
+            'metrics': metrics or {},
+        })
+        self._timer = None
+        self._publish(wait=False)
+
+    def _publish(self, wait):
+        while self._open_epochs:
+            epoch = self._open_epochs[0]
+            copies = self._pending[:epoch['copies']]
+            if not wait and not (epoch['timer'].ready() and all(copy.ready() for copy in copies)):
+                return
+
+            for copy in copies:
+                self._loss_parts.append((copy.epochs, copy.steps, copy.result()))
+            del self._pending[:epoch['copies']]
+            self._open_epochs.pop(0)
+
+            losses = self._loss_parts[-1][2] if epoch['steps'] else None
+            record = {
+                'epoch': epoch['epoch'],
+                'steps': epoch['steps'],
+                'rows': epoch['rows'],
+                'seconds': epoch['seconds'],
+                'rows_per_sec': epoch['rows_per_sec'],
+                'generator_loss': float(losses[-1, 0]) if epoch['steps'] else float('nan'),
+                'discriminator_loss': float(losses[-1, 1]) if epoch['steps'] else float('nan'),
+            }
+            for name, seconds in epoch['timer'].resolve().items():
+                record[f'{name}_seconds'] = seconds
+            for name in self._metrics:
+                record[name] = epoch['metrics'].get(name, float('nan'))
+
+            self._epoch_records.append(record)
+            self._step_losses = None
+            for sink in self._sinks:
+                sink.write(record)
+
+    def state_dict(self):
+        """Published epoch records and step losses, to carry them over when training resumes."""
+        self._publish(wait=True)
+        return {'epoch_records': list(self._epoch_records), 'loss_parts': list(self._loss_parts)}
+
+    def load_state_dict(self, state):
+        """Restore the records of an interrupted run; they are written to the sinks again."""
+        self._epoch_records = list(state['epoch_records'])
+        self._loss_parts = list(state['loss_parts'])
+        self._step_losses = None
+        for record in self._epoch_records:
+            for sink in self._sinks:
+                sink.write(record)
+
+    def close(self):
+        """Wait for the outstanding copies, publish the last epochs and close the sinks."""
+        self._publish(wait=True)
+        for sink in self._sinks:
+            sink.close()
+        self._sinks = []
+        self._buffer = None
+
+    @property
+    def last_record(self):
+        """Latest published epoch record, or None."""
+        return self._epoch_records[-1] if self._epoch_records else None
+
+    @property
+    def epoch_records(self):
+        """Published epoch records as a DataFrame."""
+        return pd.DataFrame(self._epoch_records)
+
+    @property
+    def step_losses(self):
+        """Generator and discriminator loss of every published step as a DataFrame."""
+        if self._step_losses is None:
+            if self._loss_parts:
+                epochs, steps, losses = (np.concatenate(part) for part in zip(*self._loss_parts))
+            else:
+                epochs, steps, losses = np.zeros(0, int), np.zeros(0, int), np.zeros((0, 2))
+            self._step_losses = pd.DataFrame({
+                'Epoch': epochs,
+                'Step': steps,
+                'Generator Loss': losses[:, 0],
+                'Discriminator Loss': losses[:, 1],
+            })
+        return self._step_losses
+
+    def loss_values(self):
+        """Losses of the last step of every published epoch, like `SynPro.loss_values`."""
+        return pd.DataFrame({
+            'Epoch': [record['epoch'] for record in self._epoch_records],
+            'Generator Loss': [record['generator_loss'] for record in self._epoch_records],
+            'Discriminator Loss': [record['discriminator_loss'] for record in self._epoch_records],
+        })
+
+    def __getstate__(self):
+        self._publish(wait=True)
+        state = self.__dict__.copy()
+        state.update(_sinks=[], _buffer=None, _pending=[], _timer=None)
+        return state
@@ -0,0 +1,152 @@
+"""Tests for the conditional vector and real row sampling of DataSampler."""
+
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+
+from synpro.data_sampler import DataSampler, DeviceDataSampler, count_categories
+from synpro.data_transformer import DataTransformer
+
+
+def _encoded():
+    rng = np.random.RandomState(0)
+    data = pd.DataFrame({
+        'x': rng.normal(size=3000),
+        'small': rng.choice(['a', 'b'], size=3000, p=[0.9, 0.1]),
+        'large': rng.choice([f'v{i}' for i in range(50)], size=3000, p=np.arange(1, 51) / 1275),
+    })
+    transformer = DataTransformer()
+    transformer.fit(data, ['small', 'large'])
+    return transformer.encode(data), transformer.output_info_list
+
+
+def _sampler(log_frequency):
+    encoded, output_info = _encoded()
+    return DataSampler(encoded, output_info, log_frequency)
+
+
+def _discrete_spans(output_info):
+    """(start, width) in the dense data of every discrete column."""
+    spans = []
+    st = 0
+    for col_info in output_info:
+        if len(col_info) == 1 and col_info[0].activation_fn == 'softmax':
+            spans.append((st, col_info[0].dim))
+        st += sum(span_info.dim for span_info in col_info)
+    return spans
+
+
+def _loop_choice(sampler, discrete_column_id):
+    """Per-row draw of the sampler before it was vectorized."""
+    chosen = []
+    for col in discrete_column_id:
+        cdf = sampler._discrete_column_category_prob[col].cumsum()
+        chosen.append((cdf > np.random.rand()).argmax())
+    return np.array(chosen)
+
+
+@pytest.mark.parametrize('log_frequency', [True, False])
+def test_vectorized_choice_matches_per_row_loop(log_frequency):
+    sampler = _sampler(log_frequency)
+    discrete_column_id = np.random.RandomState(1).randint(2, size=20000)
+
+    np.random.seed(2)
+    expected = _loop_choice(sampler, discrete_column_id)
+    np.random.seed(2)
+    chosen = sampler._random_choice_prob_index(discrete_column_id)
+
+    np.testing.assert_array_equal(chosen, expected)
+
+
+def test_sampled_categories_follow_category_probabilities():
+    sampler = _sampler(log_frequency=True)
+    np.random.seed(0)
+    for col in range(2):
+        chosen = sampler._random_choice_prob_index(np.full(100000, col))
+        probs = sampler._discrete_column_category_prob[col]
+        frequencies = np.bincount(chosen, minlength=len(probs)) / len(chosen)
+        np.testing.assert_allclose(frequencies, probs, atol=0.01)
+
+
+def test_row_index_matches_per_category_scans():
+    encoded, output_info = _encoded()
+    sampler = DataSampler(encoded, output_info, True)
+    dense = encoded.to_dense()
+
+    category = 0
+    for st, dim in _discrete_spans(output_info):
+        for k in range(dim):
+            # the row ids of every category, as the per-category lists used to hold them
+            expected = np.nonzero(dense[:, st + k])[0]
+            offset = sampler._rid_by_cat_offsets[category]
+            rows = sampler._rid_by_cat_flat[offset:offset + sampler._rid_by_cat_lengths[category]]
+            np.testing.assert_array_equal(rows, expected)
+            category += 1
+
+
+def test_sampled_rows_match_their_condition():
+    encoded, output_info = _encoded()
+    sampler = DataSampler(encoded, output_info, True)
+    dense = encoded.to_dense()
+    starts = np.array([st for st, _ in _discrete_spans(output_info)])
+
+    np.random.seed(0)
+    _, _, col, opt = sampler.sample_condvec(5000)
+    idx = sampler.sample_idx(5000, col, opt)
+    assert (dense[idx, starts[col] + opt] == 1).all()
+
+    # rows are drawn uniformly within a category
+    rows = sampler.sample_idx(20000, np.zeros(20000, dtype=int), np.ones(20000, dtype=int))
+    category_rows = np.nonzero(dense[:, starts[0] + 1])[0]
+    counts = np.bincount(rows, minlength=len(dense))[category_rows]
+    assert counts.sum() == 20000
+    assert counts.std() / counts.mean() < 0.2
+
+
+def test_out_of_range_conditions_fall_back_to_random_rows():
+    sampler = _sampler(log_frequency=True)
+    np.random.seed(0)
+    idx = sampler.sample_idx(4, np.array([0, 5, -1, 1]), np.array([7, 0, 0, 100]))
+    assert ((idx >= 0) & (idx < 3000)).all()
+
+
+def test_device_sampler_matches_host_sampler():
+    encoded, output_info = _encoded()
+    sampler = DataSampler(encoded, output_info, True)
+    torch.manual_seed(0)
+    device_sampler = DeviceDataSampler(sampler, encoded, 'cpu')
+    assert device_sampler.dim_cond_vec() == sampler.dim_cond_vec()
+
+    np.random.seed(0)
+    _, _, host_col, host_opt = sampler.sample_condvec(50000)
+    cond, mask, col, opt = device_sampler.sample_condvec(50000)
+    cond, mask, col, opt = cond.numpy(), mask.numpy(), col.numpy(), opt.numpy()
+    rows = np.arange(50000)
+    assert (mask[rows, col] == 1).all() and (mask.sum(axis=1) == 1).all()
+    assert (cond[rows, sampler._discrete_column_cond_st[col] + opt] == 1).all()
+    assert (cond.sum(axis=1) == 1).all()
+    for column in range(2):
+        n_category = sampler._discrete_column_n_category[column]
+        host = np.bincount(host_opt[host_col == column], minlength=n_category)
+        device = np.bincount(opt[col == column], minlength=n_category)
+        np.testing.assert_allclose(device / device.sum(), host / host.sum(), atol=0.01)
+
+    # the same dense rows as the host sampler, on the device
+    dense = encoded.to_dense()
+    starts = np.array([st for st, _ in _discrete_spans(output_info)])
+    real = device_sampler.sample_data(2000, torch.from_numpy(col[:2000]), torch.from_numpy(opt[:2000]))
+    real = real.numpy()
+    assert (real[np.arange(2000), starts[col[:2000]] + opt[:2000]] == 1).all()
+    dense_rows = {row.tobytes() for row in dense}
+    assert all(row.tobytes() in dense_rows for row in real)
+
+
+def test_device_sampler_skips_empty_categories():
+    encoded, output_info = _encoded()
+    counts = count_categories(encoded, output_info)
+    counts[0][1] = 0
+    sampler = DataSampler(encoded, output_info, True, category_counts=counts)
+    torch.manual_seed(0)
+    _, _, col, opt = DeviceDataSampler(sampler, encoded, 'cpu').sample_condvec(20000)
+    assert not ((col == 0) & (opt == 1)).any()
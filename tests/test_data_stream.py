@@ -0,0 +1,33 @@
+"""Tests for out-of-core training data."""
+
+import numpy as np
+import pandas as pd
+
+from synpro.data_stream import ChunkedDataSampler, iter_data_chunks
+from synpro.data_transformer import DataTransformer
+
+
+def test_windows_of_a_sorted_stream_condition_on_their_own_rows():
+    rng = np.random.RandomState(0)
+    data = pd.DataFrame({
+        'c': np.repeat(['a', 'b', 'c', 'd'], 300),
+        'x': rng.normal(size=1200),
+    })
+    transformer = DataTransformer()
+    transformer.fit(data, ['c'])
+    sampler = ChunkedDataSampler(
+        iter_data_chunks(data, chunksize=200), transformer, True, max_chunks_in_memory=2
+    )
+
+    np.random.seed(0)
+    n_windows = 0
+    for train_data, data_sampler in sampler.iter_windows():
+        n_windows += 1
+        assert data_sampler.dim_cond_vec() == 4
+        _, _, col, opt = data_sampler.sample_condvec(1000)
+        idx = data_sampler.sample_idx(1000, col, opt)
+        np.testing.assert_array_equal(train_data.span_codes(0)[idx], opt)
+
+    assert n_windows == 3
+    # sampling-time conditions still follow the whole stream
+    np.testing.assert_allclose(sampler.data_sampler._discrete_column_category_prob[0], 0.25)
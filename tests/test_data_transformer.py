@@ -0,0 +1,386 @@
+"""Tests for the DataTransformer and its NumPy encoders."""
+
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+from rdt.transformers import ClusterBasedNormalizer, OneHotEncoder
+
+from synpro.data_transformer import DataTransformer, EncodedData
+from synpro.encoders import ContinuousEncoder, DiscreteEncoder
+from synpro.model import SynPro
+
+
+def _data(rows=2000, seed=0):
+    rng = np.random.RandomState(seed)
+    return pd.DataFrame({
+        'x': np.concatenate([rng.normal(-5, 1, rows // 2), rng.normal(5, 2, rows - rows // 2)]),
+        'c': rng.choice(['a', 'b', 'c'], size=rows),
+    })
+
+
+def test_seeded_fit_is_reproducible_with_transform_workers():
+    data = _data()
+    samples = []
+    for _ in range(2):
+        model = SynPro(epochs=1, batch_size=100, cuda=False, transformer_n_jobs=2)
+        model.set_random_state(7)
+        model.fit(data, ['c'])
+        samples.append(model.sample(200))
+
+    pd.testing.assert_frame_equal(samples[0], samples[1])
+
+
+def _fitted_normalizer(values):
+    data = pd.DataFrame({'x': values})
+    normalizer = ClusterBasedNormalizer(missing_value_generation='from_column', max_clusters=10)
+    normalizer.fit(data, 'x')
+    return data, normalizer
+
+
+def test_continuous_encoder_matches_cluster_based_normalizer():
+    rng = np.random.RandomState(0)
+    # well separated modes, so the drawn component is the same for both RNG schemes
+    data, normalizer = _fitted_normalizer(
+        np.concatenate([rng.normal(-10, 0.5, 500), rng.normal(10, 0.5, 500)])
+    )
+    np.random.seed(0)
+    expected = normalizer.transform(data)
+    encoder = ContinuousEncoder(normalizer)
+    np.random.seed(0)
+    normalized, component = encoder.transform(data['x'].to_numpy())
+
+    np.testing.assert_array_equal(component, expected['x.component'].to_numpy())
+    np.testing.assert_allclose(normalized, expected['x.normalized'].to_numpy(), rtol=1e-6, atol=1e-6)
+
+    reversed_data = normalizer.reverse_transform(expected)
+    np.testing.assert_allclose(
+        encoder.reverse(expected['x.normalized'].to_numpy(), component),
+        reversed_data['x'].to_numpy(),
+    )
+
+
+def test_continuous_encoder_component_frequencies_match_cluster_based_normalizer():
+    rng = np.random.RandomState(1)
+    # overlapping modes, where components are drawn at random
+    data, normalizer = _fitted_normalizer(
+        np.concatenate([rng.normal(0, 1, 3000), rng.normal(1.5, 1, 3000)])
+    )
+    n_components = normalizer.valid_component_indicator.sum()
+    np.random.seed(0)
+    expected = normalizer.transform(data)['x.component'].to_numpy().astype(int)
+    np.random.seed(0)
+    _, component = ContinuousEncoder(normalizer).transform(data['x'].to_numpy())
+
+    expected_frequencies = np.bincount(expected, minlength=n_components) / len(expected)
+    frequencies = np.bincount(component, minlength=n_components) / len(component)
+    np.testing.assert_allclose(frequencies, expected_frequencies, atol=0.03)
+
+
+def test_discrete_encoder_matches_one_hot_encoder():
+    data = pd.DataFrame({'c': ['a', 'b', None, 'c', 'a', 'b']})
+    one_hot = OneHotEncoder()
+    one_hot.fit(data, 'c')
+    encoder = DiscreteEncoder(one_hot)
+
+    codes = encoder.transform(data['c'].to_numpy())
+    np.testing.assert_array_equal(codes, one_hot.transform(data).to_numpy().argmax(axis=1))
+
+    dummies = np.eye(len(one_hot.dummies))[codes]
+    expected = one_hot.reverse_transform(
+        pd.DataFrame(dummies, columns=[f'c.value{i}' for i in range(dummies.shape[1])])
+    )
+    assert list(encoder.reverse(codes)) == list(expected['c'])
+
+
+def test_inverse_transform_matches_rdt():
+    data = _data(rows=500)
+    transformer = DataTransformer()
+    transformer.fit(data, ['c'])
+    encoded = transformer.encode(data)
+
+    expected = []
+    for i, cti in enumerate(transformer._column_transform_info_list):
+        if cti.column_type == 'continuous':
+            frame = pd.DataFrame({
+                'x.normalized': encoded.continuous[:, 0].astype('float64'),
+                'x.component': encoded.codes[:, i].astype('float64'),
+            })
+        else:
+            frame = pd.DataFrame(
+                np.eye(cti.output_dimensions)[encoded.codes[:, i]],
+                columns=[f'c.value{j}' for j in range(cti.output_dimensions)],
+            )
+        expected.append(cti.transform.reverse_transform(frame))
+
+    recovered = transformer.inverse_transform(encoded.to_dense())
+    np.testing.assert_allclose(recovered['x'].to_numpy(), expected[0]['x'].to_numpy(), rtol=1e-6)
+    assert list(recovered['c']) == list(expected[1]['c'])
+
+
+def test_default_n_jobs_is_sequential():
+    transformer = DataTransformer()
+    transformer.fit(_data(rows=1000), ['c'])
+
+    assert transformer._n_workers() == 1
+
+
+def test_inverse_transform_keeps_pandas_extension_dtypes():
+    rng = np.random.RandomState(0)
+    data = pd.DataFrame({
+        'category': pd.Categorical(rng.choice(['a', 'b'], size=300)),
+        'string': pd.Series(rng.choice(['x', 'y', None], size=300), dtype='string'),
+        'int': pd.Series(rng.randint(0, 3, size=300), dtype='Int64'),
+        'count': pd.Series(rng.randint(0, 100, size=300), dtype='Int64'),
+        'x': rng.normal(size=300),
+    })
+    transformer = DataTransformer()
+    transformer.fit(data, ['category', 'string', 'int'])
+
+    recovered = transformer.inverse_transform(transformer.transform(data))
+
+    pd.testing.assert_series_equal(recovered.dtypes, data.dtypes)
+    pd.testing.assert_frame_equal(
+        recovered[['category', 'string', 'int']], data[['category', 'string', 'int']]
+    )
+
+
+def _rdt_dense(transformer, data):
+    """Dense matrix of the column-by-column RDT transforms, as `transform` used to build it."""
+    columns = []
+    for cti in transformer._column_transform_info_list:
+        transformed = cti.transform.transform(data[[cti.column_name]]).to_numpy()
+        if cti.column_type == 'continuous':
+            components = np.eye(cti.output_dimensions - 1)[transformed[:, 1].astype(int)]
+            columns.append(np.column_stack([transformed[:, 0], components]))
+        else:
+            columns.append(transformed)
+    return np.concatenate(columns, axis=1).astype(float)
+
+
+def test_encoded_data_round_trip():
+    rng = np.random.RandomState(0)
+    # well separated modes, so the drawn components do not depend on the RNG scheme
+    data = pd.DataFrame({
+        'x': np.concatenate([rng.normal(-10, 0.5, 300), rng.normal(10, 0.5, 300)]),
+        'c': rng.choice(['a', 'b', 'c'], size=600),
+    })
+    transformer = DataTransformer()
+    transformer.fit(data, ['c'])
+    np.random.seed(0)
+    encoded = transformer.encode(data)
+
+    dense = encoded.to_dense()
+    assert dense.dtype == np.float32
+    assert encoded.shape == dense.shape == (600, transformer.output_dimensions)
+    assert encoded.nbytes < dense.nbytes
+    np.testing.assert_allclose(dense, _rdt_dense(transformer, data), rtol=1e-6, atol=1e-6)
+
+    idx = np.random.RandomState(1).randint(600, size=50)
+    np.testing.assert_array_equal(encoded[idx], dense[idx])
+    np.testing.assert_array_equal(encoded.take_tensor(idx, 'cpu').numpy(), dense[idx])
+    parts = EncodedData.concatenate([
+        EncodedData(encoded.output_info_list, encoded.continuous[start:end], encoded.codes[start:end])
+        for start, end in [(0, 100), (100, 600)]
+    ])
+    np.testing.assert_array_equal(parts.to_dense(), dense)
+
+    recovered = transformer.inverse_transform(dense)
+    assert list(recovered['c']) == list(data['c'])
+    np.testing.assert_allclose(recovered['x'], data['x'], atol=1e-4)
+
+
+def _gmm_parameters(transformer):
+    return [
+        (cti.column_name, cti.output_dimensions, cti.transform._bgm_transformer.means_.tolist())
+        for cti in transformer._column_transform_info_list
+        if cti.column_type == 'continuous'
+    ]
+
+
+def test_parallel_and_cached_fits_match_sequential_fit(tmp_path):
+    data = _data(rows=1000)
+    data['y'] = np.random.RandomState(1).exponential(size=1000)
+    sequential = DataTransformer()
+    sequential.fit(data, ['c'])
+    expected = _gmm_parameters(sequential)
+
+    parallel = DataTransformer(n_jobs=2)
+    parallel.fit(data, ['c'])
+    assert _gmm_parameters(parallel) == expected
+    assert parallel.output_info_list == sequential.output_info_list
+
+    cached = DataTransformer(cache_dir=tmp_path)
+    cached.fit(data, ['c'])
+    assert len(list(tmp_path.glob('*.pkl'))) == 2
+    cached = DataTransformer(cache_dir=tmp_path)
+    cached.fit(data, ['c'])
+    assert _gmm_parameters(cached) == expected
+
+    # a changed column misses the cache
+    data['y'] = data['y'] * 2
+    cached.fit(data, ['c'])
+    assert len(list(tmp_path.glob('*.pkl'))) == 3
+
+
+def test_max_fit_rows_subsample_depends_only_on_the_data():
+    data = _data(rows=3000)
+    fits = []
+    for seed in [0, 1]:
+        np.random.seed(seed)
+        transformer = DataTransformer(max_fit_rows=500)
+        transformer.fit(data, ['c'])
+        fits.append(_gmm_parameters(transformer))
+
+    assert fits[0] == fits[1]
+
+
+def _reference_inverse_transform(transformer, data, sigmas=None):
+    """inverse_transform before the typed column buffers: RDT reverse, column_stack, astype."""
+    recovered = []
+    st = 0
+    for cti in transformer._column_transform_info_list:
+        column_data = data[:, st:st + cti.output_dimensions]
+        if cti.column_type == 'continuous':
+            frame = pd.DataFrame(column_data[:, :2], columns=list(cti.transform.get_output_sdtypes()))
+            frame = frame.astype(float)
+            frame[frame.columns[1]] = np.argmax(column_data[:, 1:], axis=1)
+            if sigmas is not None:
+                frame.iloc[:, 0] = np.random.normal(frame.iloc[:, 0], sigmas[st])
+            recovered.append(cti.transform.reverse_transform(frame)[cti.column_name])
+        else:
+            frame = pd.DataFrame(column_data, columns=list(cti.transform.get_output_sdtypes()))
+            recovered.append(cti.transform.reverse_transform(frame)[cti.column_name])
+        st += cti.output_dimensions
+
+    names = [cti.column_name for cti in transformer._column_transform_info_list]
+    return pd.DataFrame(np.column_stack(recovered), columns=names).astype(transformer._column_raw_dtypes)
+
+
+def _generator_like_output(transformer, rows, seed):
+    """Random activated output: tanh values in (-1, 1) and softmax spans."""
+    rng = np.random.RandomState(seed)
+    columns = []
+    for col_info in transformer.output_info_list:
+        for span_info in col_info:
+            if span_info.activation_fn == 'tanh':
+                columns.append(np.tanh(rng.normal(size=(rows, span_info.dim))))
+            else:
+                logits = rng.normal(size=(rows, span_info.dim)) * 3
+                columns.append(np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True))
+    return np.concatenate(columns, axis=1).astype('float32')
+
+
+def _mixed_data(rows=1000):
+    rng = np.random.RandomState(0)
+    return pd.DataFrame({
+        'float': rng.normal(size=rows),
+        'int': rng.randint(0, 1000, size=rows),
+        'label': rng.choice(['a', 'b', 'c'], size=rows),
+        'flag': rng.choice([True, False], size=rows),
+        'code': rng.choice([1, 2, 3], size=rows),
+    })
+
+
+@pytest.mark.parametrize('with_sigmas', [False, True])
+def test_inverse_transform_matches_column_stacked_version(with_sigmas):
+    data = _mixed_data()
+    transformer = DataTransformer()
+    transformer.fit(data, ['label', 'flag', 'code'])
+    output = _generator_like_output(transformer, 1000, seed=1)
+    sigmas = np.full(transformer.output_dimensions, 0.05) if with_sigmas else None
+
+    np.random.seed(2)
+    expected = _reference_inverse_transform(transformer, output, sigmas)
+    np.random.seed(2)
+    recovered = transformer.inverse_transform(output, sigmas)
+
+    pd.testing.assert_frame_equal(recovered, expected, check_exact=False, rtol=1e-6)
+
+
+def _reference_value_to_id(transformer, column_name, value):
+    """convert_column_name_value_to_id before the lookup index: column scan and RDT transform."""
+    discrete_counter = 0
+    column_id = 0
+    for cti in transformer._column_transform_info_list:
+        if cti.column_name == column_name:
+            break
+        if cti.column_type == 'discrete':
+            discrete_counter += 1
+        column_id += 1
+
+    one_hot = cti.transform.transform(pd.DataFrame([value], columns=[column_name])).to_numpy()[0]
+    assert one_hot.sum() == 1
+    return {
+        'discrete_column_id': discrete_counter,
+        'column_id': column_id,
+        'value_id': int(np.argmax(one_hot)),
+    }
+
+
+def test_condition_lookup_matches_column_scan():
+    data = _mixed_data()
+    data.loc[::7, 'label'] = np.nan
+    transformer = DataTransformer()
+    transformer.fit(data, ['label', 'flag', 'code'])
+
+    cond_offset = 0
+    for column in ['label', 'flag', 'code']:
+        categories = list(data[column].unique())
+        for value in categories:
+            info = transformer.convert_column_name_value_to_id(column, value)
+            expected = _reference_value_to_id(transformer, column, value)
+            assert info == {**expected, 'cond_offset': cond_offset + expected['value_id']}
+
+        ids = transformer.convert_column_name_values_to_ids(column, categories)
+        assert list(ids['value_id']) == [
+            transformer.convert_column_name_value_to_id(column, value)['value_id'] for value in categories
+        ]
+        cond_offset += len(categories)
+
+
+def test_condition_lookup_rejects_unknown_columns_and_values():
+    transformer = DataTransformer()
+    transformer.fit(_mixed_data(), ['label', 'flag', 'code'])
+
+    with pytest.raises(ValueError, match='not found'):
+        transformer.convert_column_name_value_to_id('missing', 'a')
+    with pytest.raises(ValueError, match='not a discrete column'):
+        transformer.convert_column_name_value_to_id('float', 1.0)
+    with pytest.raises(ValueError, match='does not exist'):
+        transformer.convert_column_name_value_to_id('label', 'z')
+    with pytest.raises(ValueError, match='do not exist'):
+        transformer.convert_column_name_values_to_ids('label', ['a', 'z'])
+
+
+def test_continuous_decoder_matches_per_column_reverse_transform():
+    rng = np.random.RandomState(0)
+    data = pd.DataFrame({
+        'wide': np.concatenate([rng.normal(-10, 1, 3000), rng.normal(0, 1, 3000), rng.normal(10, 3, 3000)]),
+        'narrow': rng.normal(size=9000),
+        'count': rng.poisson(20, size=9000),
+        'c': rng.choice(['a', 'b'], size=9000),
+    })
+    transformer = DataTransformer()
+    transformer.fit(data, ['c'])
+    decoder = transformer._get_continuous_decoder()
+    assert len({len(encoder.valid_means) for encoder in decoder.encoders}) > 1
+
+    # more rows than one decode block
+    output = _generator_like_output(transformer, 6000, seed=1)
+    noise = np.random.RandomState(2).normal(scale=0.05, size=(6000, len(decoder.encoders)))
+
+    expected = []
+    continuous = [cti for cti in transformer._column_transform_info_list if cti.column_type == 'continuous']
+    for i, (cti, st) in enumerate(zip(continuous, decoder.value_index)):
+        column_data = output[:, st:st + cti.output_dimensions]
+        frame = pd.DataFrame(column_data[:, :2], columns=list(cti.transform.get_output_sdtypes()))
+        frame = frame.astype(float)
+        frame.iloc[:, 0] += noise[:, i]
+        frame[frame.columns[1]] = np.argmax(column_data[:, 1:], axis=1)
+        expected.append(cti.transform.reverse_transform(frame)[cti.column_name].to_numpy())
+
+    for decoded in [decoder.decode(output, noise), decoder.decode(torch.from_numpy(output), noise)]:
+        for values, reference in zip(decoded, expected):
+            assert values.dtype == reference.dtype
+            np.testing.assert_allclose(values, reference, rtol=1e-6, atol=1e-9)
@@ -0,0 +1,54 @@
+"""Regression tests for fidelity-based early stopping."""
+
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+
+from synpro.model import SynPro
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_holdout_keeps_categories_of_held_out_rows(seed):
+    rng = np.random.RandomState(0)
+    data = pd.DataFrame({
+        'x': rng.normal(size=200),
+        'c': ['a'] * 100 + ['b'] * 99 + ['rare'],
+    })
+    model = SynPro(epochs=1, batch_size=50, cuda=False, eval_interval=1, eval_rows=40)
+    model.set_random_state(seed)
+    model.fit(data, ['c'])
+
+    assert model._data_sampler.dim_cond_vec() == 3
+    assert len(model.sample(5, 'c', 'rare')) == 5
+
+
+def test_restore_keeps_the_training_state_of_the_best_epoch():
+    rng = np.random.RandomState(0)
+    data = pd.DataFrame({'x': rng.normal(size=300), 'c': rng.choice(['a', 'b'], size=300)})
+    models = []
+    for epochs in [3, 1]:
+        # no later evaluation improves by min_delta, so the first epoch is the best
+        model = SynPro(
+            epochs=epochs, batch_size=50, cuda=False, eval_interval=1, eval_rows=50,
+            patience=10, min_delta=1e9,
+        )
+        model.set_random_state(0)
+        model.fit(data, ['c'])
+        models.append(model)
+
+    restored, best = models
+    assert restored.best_epoch == best.best_epoch == 0
+    for name, obj in restored._training_state().items():
+        _assert_state_equal(obj.state_dict(), best._training_state()[name].state_dict())
+
+
+def _assert_state_equal(state, expected):
+    if isinstance(state, dict):
+        assert state.keys() == expected.keys()
+        for key in state:
+            _assert_state_equal(state[key], expected[key])
+    elif isinstance(state, torch.Tensor):
+        assert torch.equal(state, expected)
+    else:
+        assert state == expected
@@ -0,0 +1,77 @@
+"""Tests for the adversarial loss strategies."""
+
+import pytest
+import torch
+from torch.nn import functional as F
+
+from synpro.losses import HingeLoss, make_adv_loss
+from synpro.model import Discriminator
+
+
+def _reference_discriminator_loss(adv_loss, discriminator, real, fake, regularize):
+    """Discriminator loss as computed by the training step before the loss strategies."""
+    n_packs = real.size(0) // discriminator.pac
+    penalty_input = None
+    if regularize and adv_loss == 'wgan-gp':
+        penalty_input = discriminator.interpolate(real, fake)
+        parts = [real, fake, penalty_input]
+    elif regularize and adv_loss == 'r1':
+        real = penalty_input = real.detach().requires_grad_(True)
+        parts = [real, fake]
+    else:
+        parts = [real, fake]
+
+    scores = discriminator(torch.cat(parts, dim=0))
+    d_real = scores[:n_packs]
+    d_fake = scores[n_packs:2 * n_packs]
+    if adv_loss == 'hinge':
+        return torch.mean(F.relu(1.0 - d_real)) + torch.mean(F.relu(1.0 + d_fake))
+
+    loss_d = -(torch.mean(d_real) - torch.mean(d_fake))
+    if penalty_input is not None:
+        if adv_loss == 'wgan-gp':
+            penalty = discriminator.wgan_gp_penalty(penalty_input, scores[2 * n_packs:], 10.0)
+        else:
+            penalty = 0.5 * 10.0 * discriminator.calc_gradient_penalty_r1(penalty_input, d_real)
+        loss_d = loss_d + penalty
+    return loss_d
+
+
+def _strategy_discriminator_loss(loss, discriminator, real, fake, regularize):
+    n_packs = real.size(0) // discriminator.pac
+    parts, penalty_input = loss.discriminator_inputs(discriminator, real, fake, regularize)
+    scores = discriminator(torch.cat(parts, dim=0))
+    d_real = scores[:n_packs]
+    loss_d = loss.discriminator_loss(d_real, scores[n_packs:2 * n_packs])
+    if penalty_input is not None:
+        loss_d = loss_d + loss.penalty(discriminator, penalty_input, scores[2 * n_packs:], d_real)
+    return loss_d
+
+
+@pytest.mark.parametrize('adv_loss', ['wgan-gp', 'r1', 'hinge'])
+@pytest.mark.parametrize('regularize', [True, False])
+def test_losses_match_the_pre_refactor_step(adv_loss, regularize):
+    torch.manual_seed(0)
+    discriminator = Discriminator(6, (16, 16), pac=4).eval()
+    real = torch.randn(40, 6)
+    fake = torch.randn(40, 6)
+    loss = make_adv_loss(adv_loss)
+
+    torch.manual_seed(1)
+    expected = _reference_discriminator_loss(adv_loss, discriminator, real, fake, regularize)
+    torch.manual_seed(1)
+    loss_d = _strategy_discriminator_loss(loss, discriminator, real, fake, regularize)
+    torch.testing.assert_close(loss_d, expected, rtol=0, atol=0)
+
+    y_fake = discriminator(fake)
+    torch.testing.assert_close(loss.generator_loss(y_fake), -torch.mean(y_fake), rtol=0, atol=0)
+
+
+def test_unregularized_loss_has_zero_penalty():
+    d_real = torch.randn(5, 1)
+    assert HingeLoss().penalty(None, None, None, d_real).item() == 0
+
+
+def test_unknown_loss_is_rejected():
+    with pytest.raises(ValueError, match='Unsupported adv_loss'):
+        make_adv_loss('lsgan')
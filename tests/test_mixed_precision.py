@@ -0,0 +1,80 @@
+"""Tests for mixed-precision training and sampling."""
+
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+
+from synpro.model import Discriminator, SynPro
+
+
+def _fit(mixed_precision, adv_loss='wgan-gp'):
+    rng = np.random.RandomState(0)
+    data = pd.DataFrame({'x': rng.normal(size=400), 'c': rng.choice(['a', 'b'], size=400)})
+    model = SynPro(epochs=2, batch_size=100, cuda=False, mixed_precision=mixed_precision, adv_loss=adv_loss)
+    model.set_random_state(0)
+    model.fit(data, ['c'])
+    return model
+
+
+@pytest.mark.parametrize('mixed_precision, dtype', [
+    (False, None), (None, None), (True, torch.bfloat16), ('bf16', torch.bfloat16), ('fp16', torch.float16),
+])
+def test_amp_dtype_on_cpu(mixed_precision, dtype):
+    model = SynPro(cuda=False, mixed_precision=mixed_precision)
+    assert model._amp_dtype() == dtype
+
+
+def test_invalid_mixed_precision_is_rejected():
+    with pytest.raises(ValueError, match='mixed_precision'):
+        SynPro(mixed_precision='fp8')
+
+
+@pytest.mark.parametrize('adv_loss', ['wgan-gp', 'r1'])
+def test_fp16_uses_one_enabled_scaler_per_optimizer(adv_loss):
+    model = _fit('fp16', adv_loss)
+    assert model._scaler_g is not model._scaler_d
+    assert model._scaler_g.is_enabled() and model._scaler_d.is_enabled()
+    # steps whose scaled gradients overflow are skipped, so no inf/NaN reaches the weights
+    for network in [model._generator, model._discriminator]:
+        assert all(torch.isfinite(parameter).all() for parameter in network.parameters())
+    assert np.isfinite(model.loss_values[['Generator Loss', 'Discriminator Loss']]).all().all()
+    assert len(model.sample(50)) == 50
+
+
+def test_bf16_trains_without_loss_scaling():
+    model = _fit('bf16')
+    assert not model._scaler_g.is_enabled() and not model._scaler_d.is_enabled()
+    # without loss scaling the scalers leave the loss untouched, as in fp32 training
+    loss = torch.tensor(1.5)
+    assert model._scaler_d.scale(loss) is loss
+
+    with model._autocast():
+        output = model._generator(torch.randn(4, model._embedding_dim + model._data_sampler.dim_cond_vec()))
+    assert output.dtype == torch.bfloat16
+    assert np.isfinite(model.telemetry.step_losses[['Generator Loss', 'Discriminator Loss']]).all().all()
+    assert len(model.sample(50)) == 50
+
+
+def test_fp32_scalers_are_disabled():
+    model = _fit(False)
+    assert not model._scaler_g.is_enabled() and not model._scaler_d.is_enabled()
+
+
+def test_scaled_penalties_match_unscaled_penalties():
+    torch.manual_seed(0)
+    discriminator = Discriminator(6, (16, 16), pac=4).eval()
+    real = torch.randn(40, 6).requires_grad_(True)
+    interpolates = discriminator.interpolate(real.detach(), torch.randn(40, 6))
+    grad_scale = torch.tensor(2.0 ** 16)
+
+    disc_interpolates = discriminator(interpolates)
+    torch.testing.assert_close(
+        discriminator.wgan_gp_penalty(interpolates, disc_interpolates, 10, grad_scale),
+        discriminator.wgan_gp_penalty(interpolates, disc_interpolates, 10),
+    )
+    d_real = discriminator(real)
+    torch.testing.assert_close(
+        discriminator.calc_gradient_penalty_r1(real, d_real, grad_scale),
+        discriminator.calc_gradient_penalty_r1(real, d_real),
+    )
@@ -0,0 +1,238 @@
+"""Tests for the SynPro training internals."""
+
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+from torch.nn import functional as F
+
+from synpro.data_sampler import DataSampler
+from synpro.data_transformer import DataTransformer
+from synpro.losses import make_adv_loss
+from synpro.model import Generator, InferenceGenerator, SynPro, _TrainStep
+
+
+@pytest.fixture(scope='module')
+def fitted():
+    rng = np.random.RandomState(0)
+    data = pd.DataFrame({
+        'x': np.concatenate([rng.normal(-5, 1, 500), rng.normal(5, 1, 500)]),
+        'a': rng.choice(['p', 'q', 'r'], size=1000),
+        'y': rng.exponential(size=1000),
+        'b': rng.choice(['s', 't', 'u'], size=1000),
+        'c': rng.choice(['v', 'w'], size=1000),
+    })
+    transformer = DataTransformer()
+    transformer.fit(data, ['a', 'b', 'c'])
+    model = SynPro(cuda=False)
+    model._transformer = transformer
+    model._data_sampler = DataSampler(transformer.encode(data), transformer.output_info_list, True)
+    return model
+
+
+def _softmax_without_noise(logits, tau=1, hard=False, eps=1e-10, dim=-1, generator=None):
+    return (logits / tau).softmax(dim)
+
+
+def _reference_activate(model, data):
+    """Per-span activation of the generator output, as before the precomputed layout."""
+    out = []
+    st = 0
+    for col_info in model._transformer.output_info_list:
+        for span_info in col_info:
+            ed = st + span_info.dim
+            if span_info.activation_fn == 'tanh':
+                out.append(torch.tanh(data[:, st:ed]))
+            else:
+                out.append(model._gumbel_softmax(data[:, st:ed], tau=0.2))
+            st = ed
+    return torch.cat(out, dim=1)
+
+
+def test_activation_matches_per_span_loop(fitted, monkeypatch):
+    monkeypatch.setattr(SynPro, '_gumbel_softmax', staticmethod(_softmax_without_noise))
+    data = torch.randn(64, fitted._transformer.output_dimensions, generator=torch.Generator().manual_seed(0))
+
+    torch.testing.assert_close(fitted._apply_activate(data), _reference_activate(fitted, data))
+
+
+def test_gumbel_softmax_spans_are_distributions(fitted):
+    data = torch.randn(5000, fitted._transformer.output_dimensions)
+    activated = fitted._apply_activate(data)
+    st = 0
+    for col_info in fitted._transformer.output_info_list:
+        for span_info in col_info:
+            span = activated[:, st:st + span_info.dim]
+            if span_info.activation_fn == 'softmax':
+                torch.testing.assert_close(span.sum(dim=1), torch.ones(len(span)))
+            else:
+                assert (span.abs() <= 1).all()
+            st += span_info.dim
+
+
+def _reference_cond_loss(model, data, c, m):
+    """Per-column conditional cross entropy, as before the segment ops."""
+    losses = []
+    st_data = 0
+    st_cond = 0
+    for col_info in model._transformer.output_info_list:
+        if len(col_info) == 1 and col_info[0].activation_fn == 'softmax':
+            span = col_info[0].dim
+            losses.append(F.cross_entropy(
+                data[:, st_data:st_data + span],
+                torch.argmax(c[:, st_cond:st_cond + span], dim=1),
+                reduction='none',
+            ))
+            st_data += span
+            st_cond += span
+        else:
+            st_data += sum(span_info.dim for span_info in col_info)
+
+    return (torch.stack(losses, dim=1) * m).sum() / data.size(0)
+
+
+def test_cond_loss_matches_per_column_loop(fitted):
+    np.random.seed(0)
+    c, m, _, _ = fitted._data_sampler.sample_condvec(256)
+    c = torch.from_numpy(c)
+    m = torch.from_numpy(m)
+    data = torch.randn(256, fitted._transformer.output_dimensions, requires_grad=True)
+
+    loss = fitted._cond_loss(data, c, m)
+    (gradient,) = torch.autograd.grad(loss, data)
+    expected = _reference_cond_loss(fitted, data, c, m)
+    (expected_gradient,) = torch.autograd.grad(expected, data)
+
+    torch.testing.assert_close(loss, expected)
+    torch.testing.assert_close(gradient, expected_gradient)
+
+
+@pytest.mark.parametrize('enable_spectral_norm', [False, True])
+def test_inference_generator_matches_generator_in_eval_mode(enable_spectral_norm):
+    torch.manual_seed(0)
+    generator = Generator(16, (32, 32), 10, enable_spectral_norm=enable_spectral_norm)
+    with torch.no_grad():
+        for layer in generator.seq[:-1]:
+            layer.bn.weight.uniform_(0.5, 1.5)
+            layer.bn.bias.uniform_(-0.5, 0.5)
+        # training forwards give BatchNorm running statistics (and spectral norm vectors)
+        for _ in range(5):
+            generator(torch.randn(64, 16) * 2 + 1)
+    state = {name: value.clone() for name, value in generator.state_dict().items()}
+
+    inference_generator = InferenceGenerator(generator)
+    x = torch.randn(128, 16)
+    with torch.no_grad():
+        expected = generator.eval()(x)
+
+    torch.testing.assert_close(inference_generator(x), expected, rtol=1e-5, atol=1e-5)
+    assert not any(parameter.requires_grad for parameter in inference_generator.parameters())
+    for name, value in generator.state_dict().items():
+        assert torch.equal(value, state[name])
+
+
+def _training_data():
+    rng = np.random.RandomState(0)
+    return pd.DataFrame({'x': rng.normal(size=600), 'c': rng.choice(['a', 'b', 'c'], size=600)})
+
+
+@pytest.fixture(scope='module')
+def trained():
+    model = SynPro(epochs=1, batch_size=100, cuda=False)
+    model.set_random_state(0)
+    model.fit(_training_data(), ['c'])
+    model._generator.eval()
+    model._discriminator.eval()
+    return model
+
+
+def _train_step(model, adv_loss='wgan-gp', reg_interval=1):
+    return _TrainStep(
+        model, model._discriminator, model._optimizer_d, model._optimizer_g,
+        model._scaler_d, model._scaler_g, make_adv_loss(adv_loss), reg_interval=reg_interval,
+    )
+
+
+def _discriminator_inputs(model):
+    np.random.seed(0)
+    torch.manual_seed(0)
+    cond = torch.from_numpy(model._data_sampler.sample_condvec(100)[0])
+    fakez = torch.cat([torch.randn(100, model._embedding_dim), cond], dim=1)
+    real = model._apply_activate(torch.randn(100, model._transformer.output_dimensions))
+    return fakez, real, cond, cond[torch.randperm(100)]
+
+
+def _reference_discriminator_loss(model, adv_loss, fakez, real, c1, c2):
+    """Discriminator loss with separate real, fake and interpolate forwards, as before the packed step."""
+    discriminator = model._discriminator
+    fake_cat = torch.cat([model._apply_activate(model._generator(fakez)), c1], dim=1)
+    real_cat = torch.cat([real, c2], dim=1)
+    if adv_loss == 'r1':
+        real_cat.requires_grad_(True)
+
+    d_fake = discriminator(fake_cat)
+    d_real = discriminator(real_cat)
+    if adv_loss == 'hinge':
+        return torch.mean(F.relu(1.0 - d_real)) + torch.mean(F.relu(1.0 + d_fake))
+
+    loss_d = -(torch.mean(d_real) - torch.mean(d_fake))
+    if adv_loss == 'wgan-gp':
+        return loss_d + discriminator.calc_gradient_penalty_wgan_gp(real_cat, fake_cat, lambda_=10)
+    return loss_d + 0.5 * 10 * discriminator.calc_gradient_penalty_r1(real_cat, d_real)
+
+
+@pytest.mark.parametrize('adv_loss', ['wgan-gp', 'r1', 'hinge'])
+def test_packed_discriminator_step_matches_separate_forwards(trained, adv_loss):
+    inputs = _discriminator_inputs(trained)
+    parameters = list(trained._discriminator.parameters())
+
+    torch.manual_seed(1)
+    expected = _reference_discriminator_loss(trained, adv_loss, *inputs)
+    expected_grads = torch.autograd.grad(expected, parameters)
+    torch.manual_seed(1)
+    loss_d = _train_step(trained, adv_loss)._discriminator_loss(*inputs, regularize=True)
+    grads = torch.autograd.grad(loss_d, parameters)
+
+    torch.testing.assert_close(loss_d, expected, rtol=1e-5, atol=1e-6)
+    for grad, expected_grad in zip(grads, expected_grads):
+        torch.testing.assert_close(grad, expected_grad, rtol=1e-4, atol=1e-6)
+
+
+def test_lazy_regularization_scales_the_penalty(trained):
+    inputs = _discriminator_inputs(trained)
+    losses = {}
+    for reg_interval, regularize in [(1, False), (1, True), (4, True)]:
+        torch.manual_seed(1)
+        step = _train_step(trained, reg_interval=reg_interval)
+        losses[reg_interval, regularize] = step._discriminator_loss(*inputs, regularize).item()
+
+    penalty = losses[1, True] - losses[1, False]
+    assert penalty > 0
+    assert losses[4, True] - losses[1, False] == pytest.approx(4 * penalty, rel=1e-5)
+
+
+def test_lazy_regularization_applies_the_penalty_every_k_steps(trained, monkeypatch):
+    regularized = []
+    step = _train_step(trained, reg_interval=3)
+    discriminator_loss = step._discriminator_loss
+
+    def _record(fakez, real, c1, c2, regularize):
+        regularized.append(regularize)
+        return discriminator_loss(fakez, real, c1, c2, regularize)
+
+    monkeypatch.setattr(step, '_discriminator_loss', _record)
+    monkeypatch.setattr(step, '_discriminator_forward', _record)
+    train_data = trained._transformer.encode(_training_data())
+    data_sampler = trained._window_sampler(train_data, trained._data_sampler)
+    state = trained._training_state()
+    saved = {name: copy.deepcopy(obj.state_dict()) for name, obj in state.items()}
+    try:
+        for _ in range(7):
+            step(train_data, data_sampler)
+    finally:
+        for name, obj in state.items():
+            obj.load_state_dict(saved[name])
+
+    assert regularized == [True, False, False, True, False, False, True]
@@ -0,0 +1,57 @@
+"""Tests for the opt-in profiling of training and sampling."""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from synpro.model import SynPro
+from synpro.profiling import profile_range
+
+
+def _data():
+    rng = np.random.RandomState(0)
+    return pd.DataFrame({'x': rng.normal(size=300), 'c': rng.choice(['a', 'b'], size=300)})
+
+
+def _fit_and_sample(profiled, trace_path=None):
+    model = SynPro(epochs=2, batch_size=100, cuda=False)
+    model.set_random_state(0)
+    if not profiled:
+        model.fit(_data(), ['c'])
+        return model, model.sample(200), None
+
+    with model.profile(trace_path, print_summary=False) as profiler:
+        model.fit(_data(), ['c'])
+        sampled = model.sample(200)
+    return model, sampled, profiler
+
+
+def test_profile_records_the_stages(tmp_path):
+    trace_path = tmp_path / 'trace.json'
+    model, sampled, profiler = _fit_and_sample(True, str(trace_path))
+
+    summary = profiler.summary()
+    stages = set(summary['Stage'])
+    assert {
+        'sample_condvec', 'sample_data', 'generator', 'discriminator', 'gradient_penalty',
+        'cond_loss', 'backward', 'optimizer', 'inverse_transform',
+    } <= stages
+    assert (summary['Calls'] > 0).all()
+    assert summary['Total (s)'].is_monotonic_decreasing
+
+    with open(trace_path) as file:
+        trace_names = {event.get('name') for event in json.load(file)['traceEvents']}
+    assert {'generator', 'discriminator', 'backward'} <= trace_names
+
+    # the hooks are no-ops again once the block is left
+    assert model._profiler is None
+    assert profile_range(None, 'generator') is profile_range(None, 'backward')
+
+
+def test_profiling_does_not_change_training_or_sampling():
+    model, sampled, _ = _fit_and_sample(False)
+    profiled_model, profiled_sampled, _ = _fit_and_sample(True)
+
+    pd.testing.assert_frame_equal(profiled_model.loss_values, model.loss_values)
+    pd.testing.assert_frame_equal(profiled_sampled, sampled)
@@ -0,0 +1,136 @@
+"""Tests for sampling from a trained SynPro model."""
+
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+
+import synpro.model
+from synpro.model import SynPro
+
+
+@pytest.fixture(scope='module')
+def model():
+    rng = np.random.RandomState(0)
+    data = pd.DataFrame({
+        'x': rng.normal(size=500),
+        'c': rng.choice(['a', 'b', 'c'], size=500),
+    })
+    model = SynPro(epochs=1, batch_size=100, cuda=False)
+    model.set_random_state(0)
+    model.fit(data, ['c'])
+    yield model
+    model.close_sample_workers()
+
+
+@pytest.mark.parametrize('conditions', [None, {'c': {'a': 0.5, 'b': 0.5}}])
+def test_sharded_sampling_does_not_depend_on_n_jobs(model, monkeypatch, conditions):
+    monkeypatch.setattr(synpro.model, '_SAMPLE_SHARD_ROWS', 1000)
+    samples = []
+    for n_jobs in [1, 2, -1]:
+        model.set_random_state(3)
+        samples.append(model.sample(3500, n_jobs=n_jobs, conditions=conditions))
+
+    pd.testing.assert_frame_equal(samples[0], samples[1])
+    pd.testing.assert_frame_equal(samples[0], samples[2])
+
+
+def test_sharded_sampling_rejects_zero_jobs(model):
+    with pytest.raises(ValueError, match='n_jobs'):
+        model.sample(10, n_jobs=0)
+
+
+@pytest.mark.parametrize('generator_dim', [(), (32, 32)])
+def test_export_generator(tmp_path, generator_dim):
+    rng = np.random.RandomState(0)
+    data = pd.DataFrame({'x': rng.normal(size=200), 'c': rng.choice(['a', 'b'], size=200)})
+    model = SynPro(epochs=1, batch_size=50, cuda=False, generator_dim=generator_dim)
+    model.fit(data, ['c'])
+
+    program = model.export_generator(tmp_path / 'generator.pt2')
+    inputs = torch.randn(5, model._embedding_dim + model._data_sampler.dim_cond_vec())
+    expected = synpro.model.InferenceGenerator(model._generator)(inputs)
+    torch.testing.assert_close(program.module()(inputs), expected)
+
+
+def test_iter_sample_yields_seeded_chunks(model):
+    runs = []
+    for _ in range(2):
+        model.set_random_state(5)
+        runs.append(list(model.iter_sample(2500, chunk_size=1000)))
+
+    assert [len(chunk) for chunk in runs[0]] == [1000, 1000, 500]
+    for chunk, expected in zip(*runs):
+        pd.testing.assert_frame_equal(chunk, expected)
+
+
+@pytest.mark.parametrize('file_format', ['csv', 'parquet'])
+def test_sample_to_file_writes_the_iter_sample_chunks(model, tmp_path, file_format):
+    if file_format == 'parquet':
+        pytest.importorskip('pyarrow')
+    path = tmp_path / f'synthetic.{file_format}'
+    model.set_random_state(5)
+    expected = pd.concat(list(model.iter_sample(2500, chunk_size=1000)), ignore_index=True)
+    model.set_random_state(5)
+    model.sample_to_file(2500, path, chunk_size=1000)
+
+    written = pd.read_csv(path) if file_format == 'csv' else pd.read_parquet(path)
+    pd.testing.assert_frame_equal(written, expected, check_exact=False, rtol=1e-12)
+
+
+def _cond_vectors(model, monkeypatch, n, conditions):
+    """The conditional vectors `sample(conditions=...)` generates rows from."""
+    captured = []
+    sample_encoded = model._sample_encoded
+
+    def _capture(n, global_cond_vec, batch_size, rng=None, generator=None, cond=None):
+        captured.append(cond)
+        return sample_encoded(n, global_cond_vec, batch_size, rng, generator, cond)
+
+    monkeypatch.setattr(model, '_sample_encoded', _capture)
+    model.set_random_state(0)
+    sampled = model.sample(n, conditions=conditions)
+    monkeypatch.undo()
+    assert len(sampled) == n
+    return captured[0]
+
+
+def test_sample_conditions_on_a_single_value(model, monkeypatch):
+    cond = _cond_vectors(model, monkeypatch, 250, {'c': 'a'})
+    # the vector the `condition_column`/`condition_value` path builds
+    expected = model._condition_vector('c', 'a', 250)
+    np.testing.assert_array_equal(cond, expected)
+
+
+def test_sample_conditions_on_weighted_values(model, monkeypatch):
+    cond = _cond_vectors(model, monkeypatch, 20000, {'c': {'a': 0.3, 'b': 0.7}})
+    assert (cond.sum(axis=1) == 1).all()
+    for value, weight in [('a', 0.3), ('b', 0.7), ('c', 0.0)]:
+        position = model._transformer.convert_column_name_value_to_id('c', value)['cond_offset']
+        assert cond[:, position].mean() == pytest.approx(weight, abs=0.02)
+
+
+@pytest.mark.parametrize('as_records', [False, True])
+def test_sample_conditions_per_row(model, monkeypatch, as_records):
+    values = ['a', None, 'c', 'b', None] * 40
+    conditions = pd.DataFrame({'c': values})
+    if as_records:
+        conditions = conditions.to_dict('records')
+    cond = _cond_vectors(model, monkeypatch, 200, conditions)
+
+    assert (cond.sum(axis=1) == 1).all()
+    for row, value in enumerate(values):
+        if value is not None:
+            single = model._condition_vector('c', value, 1)[0]
+            np.testing.assert_array_equal(cond[row], single)
+
+    # unconditioned rows get a category drawn as in unconditional sampling
+    free = np.array([value is None for value in values])
+    assert len(np.unique(cond[free], axis=0)) > 1
+
+
+def test_sample_conditions_rejects_mismatched_rows(model):
+    with pytest.raises(ValueError, match='`n` is 10'):
+        model.sample(10, conditions={'c': ['a', 'b']})
+    with pytest.raises(ValueError, match='not both'):
+        model.sample(10, condition_column='c', condition_value='a', conditions={'c': 'a'})
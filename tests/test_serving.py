@@ -0,0 +1,70 @@
+"""Tests for the coalescing SamplingService."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from synpro.model import SynPro
+from synpro.serving import SamplingService
+
+
+@pytest.fixture(scope='module')
+def model():
+    rng = np.random.RandomState(0)
+    data = pd.DataFrame({
+        'x': rng.normal(size=300),
+        'c': rng.choice(['a', 'b', 'c'], size=300),
+    })
+    model = SynPro(epochs=1, batch_size=50, cuda=False)
+    model.set_random_state(0)
+    model.fit(data, ['c'])
+    return model
+
+
+def _counting(service):
+    batches = []
+    generate = service._generate
+
+    def counted(batch):
+        batches.append([request.n for request in batch])
+        return generate(batch)
+
+    service._generate = counted
+    return batches
+
+
+def test_coalesced_requests_get_their_own_rows(model):
+    with SamplingService(model, max_wait=0.5, random_state=0) as service:
+        batches = _counting(service)
+        futures = [service.submit(2), service.submit(3), service.submit(4, 'c', 'b')]
+        results = [future.result() for future in futures]
+
+    assert batches == [[2, 3, 4]]
+    assert [len(rows) for rows in results] == [2, 3, 4]
+    assert all(set(row) == {'x', 'c'} for rows in results for row in rows)
+
+
+@pytest.mark.parametrize('n', [0, -1, 1.5, '3'])
+def test_invalid_row_counts_are_rejected(model, n):
+    with SamplingService(model) as service:
+        with pytest.raises(ValueError, match='positive integer'):
+            service.submit(n)
+        assert len(service.sample(1)) == 1
+
+
+def test_failing_request_does_not_fail_the_rest_of_its_batch(model):
+    with SamplingService(model, max_wait=0.5, random_state=0) as service:
+        generate = service._generate
+
+        def failing(batch):
+            if any(request.n == 7 for request in batch):
+                raise RuntimeError('bad request')
+            return generate(batch)
+
+        service._generate = failing
+        bad = service.submit(7)
+        good = service.submit(2)
+
+        assert len(good.result()) == 2
+        with pytest.raises(RuntimeError, match='bad request'):
+            bad.result()
@@ -0,0 +1,78 @@
+"""Tests for the training telemetry and its sinks."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import torch
+
+from synpro.model import SynPro
+from synpro.telemetry import CallbackSink, TrainingTelemetry
+
+
+def _record_epochs(telemetry, losses):
+    for epoch, epoch_losses in enumerate(losses):
+        telemetry.start_epoch(epoch)
+        for loss_g, loss_d in epoch_losses:
+            with telemetry.phase('forward'):
+                telemetry.record_step(torch.tensor(loss_g), torch.tensor(loss_d), 10)
+        telemetry.end_epoch()
+
+
+def test_buffered_losses_match_the_recorded_losses():
+    rng = np.random.RandomState(0)
+    losses = [rng.normal(size=(steps, 2)).astype('float32') for steps in [7, 3, 0, 5]]
+    records = []
+    # a buffer smaller than an epoch is copied out several times per epoch
+    telemetry = TrainingTelemetry('cpu', [CallbackSink(records.append)], capacity=3)
+    _record_epochs(telemetry, losses)
+    telemetry.close()
+
+    # the per-step DataFrame the training loop used to build with `.item()`
+    expected = pd.DataFrame({
+        'Epoch': np.concatenate([np.full(len(loss), epoch) for epoch, loss in enumerate(losses)]),
+        'Step': np.concatenate([np.arange(len(loss)) for loss in losses]),
+        'Generator Loss': np.concatenate([loss[:, 0] for loss in losses]),
+        'Discriminator Loss': np.concatenate([loss[:, 1] for loss in losses]),
+    })
+    pd.testing.assert_frame_equal(telemetry.step_losses, expected, check_dtype=False)
+
+    loss_values = telemetry.loss_values()
+    assert list(loss_values['Epoch']) == [0, 1, 2, 3]
+    for epoch, loss in enumerate(losses):
+        last = loss[-1] if len(loss) else [np.nan, np.nan]
+        np.testing.assert_array_equal(
+            loss_values.loc[epoch, ['Generator Loss', 'Discriminator Loss']].to_numpy(dtype=float), last
+        )
+
+    assert [record['steps'] for record in records] == [7, 3, 0, 5]
+    assert [record['rows'] for record in records] == [70, 30, 0, 50]
+    assert all(record['forward_seconds'] >= 0 for record in records)
+
+
+def test_sinks_receive_every_epoch_record(tmp_path):
+    rng = np.random.RandomState(0)
+    data = pd.DataFrame({'x': rng.normal(size=300), 'c': rng.choice(['a', 'b'], size=300)})
+    records = []
+    model = SynPro(
+        epochs=3,
+        batch_size=100,
+        cuda=False,
+        telemetry=[tmp_path / 'telemetry.csv', tmp_path / 'telemetry.jsonl', records.append],
+    )
+    model.fit(data, ['c'])
+
+    assert [record['epoch'] for record in records] == [0, 1, 2]
+    written_csv = pd.read_csv(tmp_path / 'telemetry.csv')
+    pd.testing.assert_frame_equal(written_csv, pd.DataFrame(records), check_dtype=False)
+    with open(tmp_path / 'telemetry.jsonl') as file:
+        assert [json.loads(line) for line in file] == records
+
+    step_losses = model.telemetry.step_losses
+    assert list(step_losses['Epoch'].unique()) == [0, 1, 2]
+    last_steps = step_losses.groupby('Epoch').tail(1).reset_index(drop=True)
+    pd.testing.assert_frame_equal(
+        model.loss_values,
+        last_steps.drop(columns='Step'),
+        check_dtype=False,
+    )